@@ -7,6 +7,11 @@ What's new vs earlier:
 - **Timestamp delta encoding** per event; session base timestamp stored in header.
 - **Single-asset mode**: asset_id lives in the header; omitted from events.
 - **Raw DEFLATE** per line (no zlib header/trailer) -> base64-url.
+- **Optional batching**: several records may share one line (flush_threshold).
+- **Optional preset dictionary**: lines after the header deflate against a
+  trained dictionary (zdict); the header carries its id.
+- **Optional stream mode**: lines after the header are sync-flushed chunks of
+  one DEFLATE stream (smaller, but must be decoded in order).
 
 We still:
 - Drop 'market' and 'hash' (by design).
@@ -17,36 +22,167 @@ We still:
   * escaped JSON strings.
 
 Public surface:
-- class FrameCompressorV3(asset_id: str)
-    .compress(raw_frame_str: str) -> str | [str, str]  # may include a header line
-- function reinflate_file(input_path: str, output_path: str, ndjson: bool = True) -> None
+- class FrameCompressorV3(asset_id: str, flush_threshold: int = 0, zdict: bytes | None = None,
+                         stream: bool = False)
+    .compress(raw_frame_str: str | bytes) -> str | [str, ...]  # may include a header line
+    .flush() -> str | None                             # pending batched records
+- function reinflate_file(input_path: str, output_path: str, ndjson: bool = True,
+                          canonical: bool = False, workers: int = 1,
+                          zdict: bytes | None = None) -> None
     Reads a mixed/unknown log and writes NDJSON (or a single JSON array with --array).
+    Legacy JSON that needs no pruning is copied through verbatim unless canonical=True.
+- function reinflate_file_objects(input_path: str, workers: int = 1,
+                                  zdict: bytes | None = None) -> Iterator[Any]
+    Same reconstruction, yielded as Python objects for in-process consumers.
 
 CLI:
   python decoder.py --in updates.compact --out updates.ndjson
   python decoder.py --in updates.compact --out updates.json --array
+  python decoder.py --in updates.compact --out updates.ndjson --canonical
+  python decoder.py --in updates.compact --out updates.ndjson --workers 0   # one per CPU
+  python decoder.py --in updates.compact --out updates.ndjson --dict updates.dict
+
+Optional speedups (picked up automatically when installed; output stays raw DEFLATE):
+  pip install deflate   # libdeflate: fastest one-shot path, level 12
+  pip install isal      # Intel ISA-L: SIMD DEFLATE, used when libdeflate is absent
+  pip install orjson    # faster JSON parse/serialize
+  pip install pybase64  # SIMD base64 for every line
 """
 from __future__ import annotations
 
 import argparse
 import base64
 import json
+import os
+import re
+import sys
 import zlib
-from typing import Any, Dict, Iterable, List, Tuple, Union, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple, Union, Optional
+
+# Optional: libdeflate bindings (pip install deflate); ~2x zlib on small one-shot buffers
+try:
+    import deflate  # type: ignore
+    _HAS_LIBDEFLATE = True
+except Exception:
+    _HAS_LIBDEFLATE = False
+
+# Optional: Intel ISA-L (pip install isal); one-shot raw DEFLATE in a single C call
+try:
+    from isal import isal_zlib  # type: ignore
+    _HAS_ISAL = True
+except Exception:
+    _HAS_ISAL = False
+
+# zlib.compress() accepts wbits (raw DEFLATE) since Python 3.11
+_ZLIB_RAW_ONESHOT = sys.version_info >= (3, 11)
+
+# Optional: pybase64 (pip install pybase64); SIMD base64, byte-identical to stdlib
+try:
+    import pybase64  # type: ignore
+    _HAS_PYBASE64 = True
+except Exception:
+    _HAS_PYBASE64 = False
+
+if _HAS_PYBASE64:
+    _b64enc = pybase64.urlsafe_b64encode
+    _b64dec = pybase64.urlsafe_b64decode
+else:
+    _b64enc = base64.urlsafe_b64encode
+    _b64dec = base64.urlsafe_b64decode
+
+# Optional: orjson (pip install orjson); C JSON codec, several times faster than stdlib
+try:
+    import orjson  # type: ignore
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+if _HAS_ORJSON:
+    _loads = orjson.loads
+
+    def _loads_exact(s: Union[str, bytes]) -> Any:
+        """
+        Like _loads, but integers of any width stay exact: orjson parses ints
+        beyond 64 bits as floats, so such documents are re-parsed with stdlib.
+        For paths that hand parsed values back out (legacy/raw passthrough).
+        """
+        obj = orjson.loads(s)
+        return json.loads(s) if _has_wide_float(obj) else obj
+
+    def _dumpb(obj: Any) -> bytes:
+        """Compact UTF-8 JSON."""
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # > 64-bit ints or non-str keys: orjson refuses them, stdlib doesn't
+            return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+else:
+    _loads = _loads_exact = json.loads
+
+    def _dumpb(obj: Any) -> bytes:
+        """Compact UTF-8 JSON."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+_INT64_SPAN = float(1 << 63)
+
+def _has_wide_float(obj: Any) -> bool:
+    """Does a parsed tree hold an integral float outside int64 (maybe a widened int)?"""
+    stack = [obj]
+    pop = stack.pop
+    while stack:
+        x = pop()
+        t = type(x)
+        if t is float:
+            if abs(x) >= _INT64_SPAN and x.is_integer():
+                return True
+        elif t is dict:
+            stack.extend(x.values())
+        elif t is list:
+            stack.extend(x)
+    return False
+
+def _dumps(obj: Any) -> str:
+    """Compact JSON text."""
+    return _dumpb(obj).decode("utf-8")
 
 # ---------- Varint helpers (LEB128) ----------
 
 def _uvarint_encode(n: int, out: bytearray) -> None:
     """Unsigned LEB128."""
-    if n < 0:
-        raise ValueError("uvarint negative")
-    while n > 0x7F:
+    # unrolled for the 1-2 byte values (deltas, pool refs) that dominate
+    if n < 0x80:
+        if n < 0:
+            raise ValueError("uvarint negative")
+        out.append(n)
+    elif n < 0x4000:
         out.append((n & 0x7F) | 0x80)
-        n >>= 7
-    out.append(n & 0x7F)
+        out.append(n >> 7)
+    else:
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
 
 def _uvarint_decode(buf: bytes, i: int) -> Tuple[int, int]:
     """Return (value, new_index)."""
+    # unrolled 1..3 byte reads; longer values take the generic loop
+    try:
+        b0 = buf[i]
+        if b0 < 0x80:
+            return b0, i + 1
+        b1 = buf[i + 1]
+        if b1 < 0x80:
+            return (b0 & 0x7F) | (b1 << 7), i + 2
+        b2 = buf[i + 2]
+        if b2 < 0x80:
+            return (b0 & 0x7F) | ((b1 & 0x7F) << 7) | (b2 << 14), i + 3
+    except IndexError:
+        raise ValueError("uvarint truncated") from None
+    return _uvarint_decode_slow(buf, i)
+
+def _uvarint_decode_slow(buf: bytes, i: int) -> Tuple[int, int]:
     shift = 0
     x = 0
     while True:
@@ -61,21 +197,119 @@ def _uvarint_decode(buf: bytes, i: int) -> Tuple[int, int]:
         if shift > 70:
             raise ValueError("uvarint overflow")
 
+# ---------- Varint helpers (PrefixVarint, v4 records) ----------
+# Length lives in a unary prefix in the low bits of byte 0:
+#   xxxxxxx0 = 1 byte (7 bits), xxxxxx01 = 2 bytes (14 bits), ... 01111111 = 8 bytes,
+#   11111111 = 9 bytes (8 payload bytes, full 64 bits).
+# The decoder reads the length off the first byte instead of testing every byte.
+
+def _pvarint_encode(n: int, out: bytearray) -> None:
+    """Unsigned PrefixVarint."""
+    if n < 0x80:
+        if n < 0:
+            raise ValueError("pvarint negative")
+        out.append(n << 1)
+        return
+    if n < 0x4000:
+        out.append(((n << 2) & 0xFF) | 0x01)
+        out.append(n >> 6)
+        return
+    k = (n.bit_length() + 6) // 7
+    if k <= 8:
+        out += ((n << k) | ((1 << (k - 1)) - 1)).to_bytes(k, "little")
+    elif n < (1 << 64):
+        out.append(0xFF)
+        out += n.to_bytes(8, "little")
+    else:
+        raise ValueError("pvarint overflow")
+
+_PV_SMALL = tuple(bytes((n << 1,)) for n in range(0x80))  # 1-byte encodings
+
+def _pvarint_bytes(n: int) -> bytes:
+    """PrefixVarint as a standalone bytes object (cached for n < 128)."""
+    if 0 <= n < 0x80:
+        return _PV_SMALL[n]
+    k = (n.bit_length() + 6) // 7
+    if n < 0 or k > 8:
+        out = bytearray()
+        _pvarint_encode(n, out)  # 9-byte form / errors
+        return bytes(out)
+    return ((n << k) | ((1 << (k - 1)) - 1)).to_bytes(k, "little")
+
+def _pvarint_decode(buf: bytes, i: int) -> Tuple[int, int]:
+    """Return (value, new_index)."""
+    try:
+        tag = buf[i]
+        if not tag & 0x01:
+            return tag >> 1, i + 1
+        if not tag & 0x02:
+            return (tag >> 2) | (buf[i + 1] << 6), i + 2
+    except IndexError:
+        raise ValueError("pvarint truncated") from None
+    k = (~tag & (tag + 1)).bit_length()  # position of the first clear bit
+    if k > 8:
+        chunk = buf[i+1:i+9]
+        if len(chunk) < 8:
+            raise ValueError("pvarint truncated")
+        return int.from_bytes(chunk, "little"), i + 9
+    chunk = buf[i:i+k]
+    if len(chunk) < k:
+        raise ValueError("pvarint truncated")
+    return int.from_bytes(chunk, "little") >> k, i + k
+
 # ---------- Tiny raw-DEFLATE base64 codecs ----------
 
-def _deflate_raw_b64(data: bytes) -> str:
-    co = zlib.compressobj(level=9, wbits=-15)  # raw DEFLATE
-    comp = co.compress(data) + co.flush()
-    return base64.urlsafe_b64encode(comp).decode("ascii")
+# libdeflate needs an output bound up front; records rarely inflate past this ratio.
+# Anything larger falls back to zlib, which stays the authoritative decoder.
+_LIBDEFLATE_RATIO = 16
+
+_ZLIB_LEVEL = 9
+_ISAL_LEVEL = 3  # ISA-L's highest level
+
+def _deflate_raw_b64(data: Union[bytes, bytearray], zdict: Optional[bytes] = None) -> str:
+    # one-shot calls only: no per-line compressobj construction
+    if zdict:
+        # preset dictionary: only zlib's streaming API takes one
+        co = zlib.compressobj(level=_ZLIB_LEVEL, wbits=-15, zdict=zdict)
+        comp = co.compress(data) + co.flush()
+    elif _HAS_LIBDEFLATE:
+        comp = deflate.deflate_compress(data, 12)  # raw DEFLATE, max level
+    elif _HAS_ISAL:
+        comp = isal_zlib.compress(data, _ISAL_LEVEL, wbits=-15)
+    elif _ZLIB_RAW_ONESHOT:
+        comp = zlib.compress(data, _ZLIB_LEVEL, wbits=-15)
+    else:
+        co = zlib.compressobj(level=_ZLIB_LEVEL, wbits=-15)  # raw DEFLATE
+        comp = co.compress(data) + co.flush()
+    return _b64enc(comp).decode("ascii")
 
-def _inflate_raw_b64(token: str) -> bytes:
-    data = base64.urlsafe_b64decode(token.encode("ascii"))
+def _is_header_token(token: str) -> bool:
+    """Cheap peek: does this base64 line open with a V3 header record (one-shot DEFLATE)?"""
+    try:
+        data = _b64dec(token.encode("ascii"))
+        return zlib.decompressobj(wbits=-15).decompress(data, 1) == bytes((_REC_HEADER,))
+    except Exception:
+        return False
+
+def _inflate_raw(data: bytes, zdict: Optional[bytes] = None) -> bytes:
+    if zdict:
+        # also correct for lines written without it (the dict only pre-fills the window)
+        d = zlib.decompressobj(wbits=-15, zdict=zdict)
+        return d.decompress(data) + d.flush()
+    if _HAS_LIBDEFLATE:
+        try:
+            return deflate.deflate_decompress(data, max(256, len(data) * _LIBDEFLATE_RATIO))
+        except Exception:
+            pass
+    if _HAS_ISAL:
+        return isal_zlib.decompress(data, wbits=-15)
     return zlib.decompress(data, wbits=-15)
 
 # ---------- Event + field coding ----------
 
 _ET_CODE = {"book": 0, "price_change": 1, "tick_size_change": 2, "last_trade_price": 3}
 _ET_FROM = {v: k for k, v in _ET_CODE.items()}
+_ET_LTP = _ET_CODE["last_trade_price"]
 
 # type byte layout:
 # bits 0..2 = event_type (0..7)
@@ -92,38 +326,96 @@ _REC_RAW    = 0x58  # 'X'
 
 # header flags
 _H_SINGLE_ASSET = 1 << 0
+_H_ZDICT        = 1 << 1  # later lines use a preset DEFLATE dictionary; its id follows the assets
+_H_STREAM       = 1 << 2  # later lines are Z_SYNC_FLUSH chunks of one DEFLATE stream (inflate in order)
+
+# every Z_SYNC_FLUSH ends with an empty stored block; stream lines omit it
+_SYNC_TAIL = b"\x00\x00\xff\xff"
+
+_WINDOW = 1 << 15  # DEFLATE history window
+
+
+def zdict_id(zdict: bytes) -> int:
+    """Identifier of a preset dictionary (Adler-32, as in zlib's DICTID)."""
+    return zlib.adler32(zdict)
+
+# header format versions
+#   3: original record layout (LEB128 integers, one side byte per price_change)
+#   4: every in-record integer (counts, ts, pool refs) is a PrefixVarint, and
+#      price_change sides are a little-endian bitmap (bit k set = change k is SELL)
+#      ahead of the (price,size) pairs; the header itself stays LEB128 so the
+#      version can always be read
+_VERSION = 4
+_SUPPORTED_VERSIONS = (3, 4)
+
+# decoded side strings (interned; shared by every decoded event)
+_SIDE_BUY = sys.intern("BUY")
+_SIDE_SELL = sys.intern("SELL")
+# last_trade_price side markers
+_SIDE_BUY_B = b"\x00"
+_SIDE_SELL_B = b"\x01"
 
 
 class _StringPool:
-    """Session string pool: assigns small IDs to first-seen strings."""
-    __slots__ = ("_s2i", "_i2s", "_next")
+    """
+    Session string pool: assigns small IDs to first-seen strings.
+    Always encodes with PrefixVarints; decodes with 'vdec' (per format version).
+    """
+    __slots__ = ("_s2i", "_s2r", "_i2s", "_next", "vdec")
 
-    def __init__(self):
-        self._s2i: Dict[str, int] = {}
+    def __init__(self, vdec=_pvarint_decode):
+        self._s2i: Dict[str, int] = {}    # encoder: string -> id
+        self._s2r: Dict[str, bytes] = {}  # encoder: string -> encoded ref, filled on first hit
         self._i2s: List[str] = ["<unused>"]  # 1-based
         self._next: int = 1
+        self.vdec = vdec
 
     def encode(self, s: str, out: bytearray) -> None:
         """
         Write either:
           - ref:   (id << 1) | 0
           - lit:   (len << 1) | 1  then raw bytes
+        A ref is encoded once, on the string's first hit, and reused after that.
         """
+        r = self._s2r.get(s)
+        if r is None:
+            r = self._miss(s, out)
+            if r is None:
+                return
+        out += r
+
+    def _miss(self, s: str, out: bytearray) -> Optional[bytes]:
+        """Ref bytes of a pooled string not yet cached, or write a new literal into 'out' (None)."""
         i = self._s2i.get(s)
         if i is not None:
-            _uvarint_encode((i << 1) | 0, out)
-            return
-        # new literal
+            r = self._s2r[s] = _pvarint_bytes(i << 1)
+            return r
+        # new literal: length varint and bytes go straight into 'out'
         b = s.encode("utf-8")
-        _uvarint_encode((len(b) << 1) | 1, out)
+        v = (len(b) << 1) | 1
+        out += _PV_SMALL[v] if v < 0x80 else _pvarint_bytes(v)
         out += b
-        # add to pool
+        # add to pool (interned: later probes of the same value compare by identity)
+        s = sys.intern(s)
         self._s2i[s] = self._next
         self._i2s.append(s)
         self._next += 1
+        return None
+
+    def encode_many(self, vals: Iterable[str], out: bytearray) -> None:
+        """Encode a run of strings into 'out'; cached refs are resolved inline without a call."""
+        get = self._s2r.get
+        miss = self._miss
+        for s in vals:
+            r = get(s)
+            if r is None:
+                r = miss(s, out)
+                if r is None:
+                    continue
+            out += r
 
     def decode(self, buf: bytes, i: int) -> Tuple[str, int]:
-        v, i = _uvarint_decode(buf, i)
+        v, i = self.vdec(buf, i)
         if (v & 1) == 0:
             idx = v >> 1
             if idx <= 0 or idx >= self._next:
@@ -133,15 +425,27 @@ class _StringPool:
         ln = v >> 1
         if i + ln > len(buf):
             raise ValueError("literal overflow")
-        s = buf[i:i+ln].decode("utf-8")
+        raw = buf[i:i+ln]
+        try:
+            s = raw.decode("ascii")  # prices/sizes are ASCII: skip full UTF-8 validation
+        except UnicodeDecodeError:
+            s = raw.decode("utf-8")
+        s = sys.intern(s)
         i += ln
-        self._s2i[s] = self._next
         self._i2s.append(s)
         self._next += 1
         return s, i
 
+    def truncate(self, n: int) -> None:
+        """Forget ids >= n (undo the entries of a record that was not written)."""
+        for s in self._i2s[n:]:
+            self._s2i.pop(s, None)  # decoder pools never fill the encoder maps
+            self._s2r.pop(s, None)
+        del self._i2s[n:]
+        self._next = n
+
     def reset(self):
-        self.__init__()
+        self.__init__(self.vdec)
 
 
 # ---------- V3 Compressor (stateful) ----------
@@ -154,40 +458,67 @@ class FrameCompressorV3:
       - pools strings across frames
       - outputs raw-DEFLATE+base64 lines
 
-    .compress(raw_frame_str) -> str | [str, str]
+    .compress(raw_frame_str) -> str | [str, ...]
       May return [header_line, frame_line] the first time.
+
+    With flush_threshold > 0, records are accumulated and deflated together
+    once the pending buffer reaches that many bytes; compress() then returns
+    [] while buffering. Call .flush() at shutdown to emit the remainder.
+
+    With zdict (see train_dict.py), every line after the header is deflated
+    against that preset dictionary; the header records its id and the decoder
+    needs the same bytes (reinflate_file(..., zdict=...)).
+
+    With stream=True, lines after the header are Z_SYNC_FLUSH chunks of one
+    persistent DEFLATE stream: no per-line setup and matches reach back into
+    earlier lines, but lines only decode in order (a lost line breaks the rest
+    of the session).
     """
-    __slots__ = ("asset_id", "pool", "base_ts", "prev_ts", "wrote_header")
+    __slots__ = ("asset_id", "pool", "base_ts", "prev_ts", "wrote_header",
+                 "flush_threshold", "_batch", "_ts_cache_s", "_ts_cache_i", "zdict",
+                 "stream", "_co")
 
-    def __init__(self, asset_id: str):
+    def __init__(self, asset_id: str, flush_threshold: int = 0, zdict: Optional[bytes] = None,
+                 stream: bool = False):
         self.asset_id = asset_id
+        self.zdict = bytes(zdict) if zdict else None
+        self.stream = stream
+        self._co = None  # persistent compressobj (stream mode), created with the header
         self.pool = _StringPool()
         self.base_ts: Optional[int] = None
         self.prev_ts: Optional[int] = None
         self.wrote_header = False
+        self.flush_threshold = flush_threshold
+        self._batch = bytearray()  # pending records (encoded in place), deflated together
+        # last parsed timestamp: batched events usually repeat it verbatim
+        self._ts_cache_s: Any = None
+        self._ts_cache_i: Optional[int] = None
 
     # --- event minifiers into binary ---
 
-    @staticmethod
-    def _get_ts(ev: Dict[str, Any]) -> Optional[int]:
+    def _get_ts(self, ev: Dict[str, Any]) -> Optional[int]:
         ts = ev.get("timestamp")
         if ts is None:
             return None
+        if ts == self._ts_cache_s:
+            return self._ts_cache_i
         # timestamps are strings in Polymarket; keep exact numeric value
         try:
-            return int(ts)
+            v = int(ts)
         except Exception:
             # non-numeric; fall back to None
             return None
+        self._ts_cache_s = ts
+        self._ts_cache_i = v
+        return v
 
     def _encode_levels(self, levels: Iterable[Dict[str, str]], out: bytearray) -> None:
         # levels are [{"price": "...", "size": "..."}, ...]
         # We write count then (price,size)* using string pool
         lv = list(levels)
-        _uvarint_encode(len(lv), out)
-        for lvx in lv:
-            self.pool.encode(str(lvx.get("price", "")), out)
-            self.pool.encode(str(lvx.get("size", "")), out)
+        vals = [str(x) for lvx in lv for x in (lvx.get("price", ""), lvx.get("size", ""))]
+        out += _pvarint_bytes(len(lv))
+        self.pool.encode_many(vals, out)  # pool ids assigned in order
 
     def _encode_book(self, ev: Dict[str, Any], out: bytearray) -> None:
         # Accept bids/asks or buys/sells
@@ -204,24 +535,31 @@ class FrameCompressorV3:
 
     def _encode_price_change(self, ev: Dict[str, Any], out: bytearray) -> None:
         chs = ev.get("changes", []) or []
-        _uvarint_encode(len(chs), out)
-        for ch in chs:
-            side = str(ch.get("side", "")).upper()
-            out.append(1 if side == "SELL" else 0)  # 1 byte
-            self.pool.encode(str(ch.get("price", "")), out)
-            self.pool.encode(str(ch.get("size", "")), out)
+        # struct-of-arrays: all sides packed 8 per byte as one bitmap,
+        # followed by the pooled (price,size) pairs
+        n = len(chs)
+        sides = sum(1 << k for k, ch in enumerate(chs) if str(ch.get("side", "")).upper() == "SELL")
+        vals = [str(x) for ch in chs for x in (ch.get("price", ""), ch.get("size", ""))]
+        out += _pvarint_bytes(n)
+        out += sides.to_bytes((n + 7) >> 3, "little")
+        self.pool.encode_many(vals, out)
 
     def _encode_tick_size_change(self, ev: Dict[str, Any], out: bytearray) -> None:
-        self.pool.encode(str(ev.get("old_tick_size", "")), out)
-        self.pool.encode(str(ev.get("new_tick_size", "")), out)
+        enc = self.pool.encode
+        enc(str(ev.get("old_tick_size", "")), out)
+        enc(str(ev.get("new_tick_size", "")), out)
 
-    def _encode_last_trade_price(self, ev: Dict[str, Any], type_byte: int, out: bytearray) -> None:
-        self.pool.encode(str(ev.get("price", "")), out)
-        self.pool.encode(str(ev.get("size", "")), out)
+    def _encode_last_trade_price(self, ev: Dict[str, Any], out: bytearray) -> None:
+        enc = self.pool.encode
         side = str(ev.get("side", "")).upper()
-        out.append(1 if side == "SELL" else 0)
-        if (type_byte & _TB_OPT0) != 0:
-            self.pool.encode(str(ev.get("fee_rate_bps", "")), out)
+        enc(str(ev.get("price", "")), out)
+        enc(str(ev.get("size", "")), out)
+        out += _SIDE_SELL_B if side == "SELL" else _SIDE_BUY_B
+        if "fee_rate_bps" in ev:  # mirrored by _TB_OPT0 in the type byte
+            enc(str(ev.get("fee_rate_bps", "")), out)
+
+    # payload encoders indexed by et_code (see _ET_CODE)
+    _ENCODERS = (_encode_book, _encode_price_change, _encode_tick_size_change, _encode_last_trade_price)
 
     # --- frame builders ---
 
@@ -232,32 +570,46 @@ class FrameCompressorV3:
         self.base_ts = int(first_ts) if first_ts is not None else 0
         self.prev_ts = self.base_ts
         flags = _H_SINGLE_ASSET
-        # build header: 'H' | version=3 | flags | base_ts | asset_count=1 | asset_id
+        if self.zdict:
+            flags |= _H_ZDICT
+        if self.stream:
+            flags |= _H_STREAM
+        # build header: 'H' | version | flags | base_ts | asset_count=1 | asset_id [| dict_id]
         out = bytearray()
         out.append(_REC_HEADER)
-        _uvarint_encode(3, out)               # version
+        _uvarint_encode(_VERSION, out)        # version
         _uvarint_encode(flags, out)           # flags
         _uvarint_encode(self.base_ts, out)    # base timestamp (absolute)
         _uvarint_encode(1, out)               # asset_count
         aid_b = self.asset_id.encode("utf-8")
         _uvarint_encode(len(aid_b), out)
         out += aid_b
+        if self.zdict:
+            _uvarint_encode(zdict_id(self.zdict), out)
         self.wrote_header = True
         # reset pool at header time (fresh session)
         self.pool.reset()
+        if self.stream:
+            if self.zdict:
+                self._co = zlib.compressobj(_ZLIB_LEVEL, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, self.zdict)
+            else:
+                self._co = zlib.compressobj(_ZLIB_LEVEL, zlib.DEFLATED, -15, 9)
+        # the header line itself never uses the dictionary, so readers can learn its id first
         return _deflate_raw_b64(bytes(out))
 
+    def _drop_header(self) -> None:
+        """Undo _ensure_header (its line was never returned): the next frame opens the session."""
+        self.wrote_header = False
+        self.base_ts = None
+        self.prev_ts = None
+        self.pool.reset()
+        self._co = None
+
     def _encode_event(self, ev: Dict[str, Any], out: bytearray) -> None:
         et = str(ev.get("event_type", ""))
         et_code = _ET_CODE.get(et)
         if et_code is None:
-            # Unknown dict: fall back to JSON literal payload (rare)
-            # format: treat as raw frame with a JSON string; decoder will parse JSON
-            payload = json.dumps(ev, separators=(",", ":"))
-            # write as RAW record embedded inside a frame: et=7 reserved style
-            # simpler: emit as a RAW top-level frame externally (one line)
-            # But since we're inside the frame builder, encode as last_trade_price with no fields is messy.
-            # Instead, raise and upstream will store raw JSON.
+            # Unknown dict (rare): raise and upstream will store raw JSON
             raise ValueError(f"Unknown event_type: {et}")
 
         # timestamp delta
@@ -281,51 +633,88 @@ class FrameCompressorV3:
         tb = et_code & 0x07
         if ts_abs:
             tb |= _TB_TS_ABS
-        if et_code == _ET_CODE["last_trade_price"] and ("fee_rate_bps" in ev):
+        if et_code == _ET_LTP and ("fee_rate_bps" in ev):
             tb |= _TB_OPT0
 
         out.append(tb)
-        _uvarint_encode(ts_val, out)
+        # small deltas (the common case) come straight from the 1-byte table
+        out += _PV_SMALL[ts_val] if 0 <= ts_val < 0x80 else _pvarint_bytes(ts_val)
 
         # payload
-        if et_code == 0:
-            self._encode_book(ev, out)
-        elif et_code == 1:
-            self._encode_price_change(ev, out)
-        elif et_code == 2:
-            self._encode_tick_size_change(ev, out)
-        elif et_code == 3:
-            self._encode_last_trade_price(ev, tb, out)
-
-    def _encode_frame_events(self, events: List[Dict[str, Any]]) -> str:
-        out = bytearray()
-        out.append(_REC_FRAME)
-        _uvarint_encode(len(events), out)
-        for ev in events:
-            self._encode_event(ev, out)
-        return _deflate_raw_b64(bytes(out))
+        self._ENCODERS[et_code](self, ev, out)
+
+    def _encode_frame_events(self, events: List[Dict[str, Any]]) -> Optional[str]:
+        # encode straight into the pending buffer; roll back if an event fails
+        out = self._batch
+        start = len(out)
+        pool_mark = self.pool._next
+        prev_ts = self.prev_ts
+        try:
+            out.append(_REC_FRAME)
+            _pvarint_encode(len(events), out)
+            for ev in events:
+                self._encode_event(ev, out)
+        except Exception:
+            del out[start:]
+            self.pool.truncate(pool_mark)
+            self.prev_ts = prev_ts
+            raise
+        return self._maybe_flush()
+
+    def _encode_raw(self, s: str) -> Optional[str]:
+        out = self._batch
+        out.append(_REC_RAW)
+        # store the raw string via string pool as a literal
+        self.pool.encode(s, out)
+        return self._maybe_flush()
+
+    # --- batching ---
+
+    def _maybe_flush(self) -> Optional[str]:
+        # Records are self-delimiting, so a line may simply concatenate them.
+        if len(self._batch) >= self.flush_threshold:
+            return self.flush()
+        return None
+
+    @staticmethod
+    def _lines(header: Optional[str], line: Optional[str]) -> Union[str, List[str]]:
+        if header:
+            return [header, line] if line else [header]
+        return line if line else []
 
     # --- public entry point ---
 
-    def compress(self, raw_frame_str: str) -> Union[str, List[str]]:
+    def flush(self) -> Optional[str]:
+        """Deflate any pending batched records into one line (None if empty)."""
+        if not self._batch:
+            return None
+        co = self._co
+        if co is not None:
+            # sync-flush keeps the window; the fixed 00 00 FF FF tail is restored on decode
+            comp = co.compress(self._batch) + co.flush(zlib.Z_SYNC_FLUSH)
+            line = _b64enc(comp[:-4]).decode("ascii")
+        else:
+            line = _deflate_raw_b64(self._batch, self.zdict)
+        self._batch.clear()
+        return line
+
+    def compress(self, raw_frame_str: Union[str, bytes]) -> Union[str, List[str]]:
         """
-        Encode a raw websocket frame (string). Returns either:
+        Encode a raw websocket frame (str, or the UTF-8 bytes off the wire). Returns either:
           - one base64 line (frame), or
-          - [header_line, frame_line] the first time a timestamped event is seen.
+          - [header_line, frame_line] the first time a timestamped event is seen, or
+          - [] / [header_line] while records are being batched.
         """
         # PONG / non-JSON:
         try:
-            obj = json.loads(raw_frame_str)
+            obj = _loads(raw_frame_str)
         except Exception:
             # raw text
             # header still needed (pool/timestamps), but we can write header with base_ts=0
             header = self._ensure_header(first_ts=None)
-            out = bytearray()
-            out.append(_REC_RAW)
-            # store the raw string via string pool as a literal
-            self.pool.encode(str(raw_frame_str), out)
-            line = _deflate_raw_b64(bytes(out))
-            return [header, line] if header else line
+            if isinstance(raw_frame_str, (bytes, bytearray)):
+                raw_frame_str = raw_frame_str.decode("utf-8", "replace")
+            return self._lines(header, self._encode_raw(str(raw_frame_str)))
 
         # JSON dict or list
         if isinstance(obj, dict):
@@ -334,12 +723,9 @@ class FrameCompressorV3:
             # The market channel typically sends a list of one dict
             events = obj
         else:
+            # bare JSON value (rare): re-parse exactly, it is stored verbatim
             header = self._ensure_header(first_ts=None)
-            out = bytearray()
-            out.append(_REC_RAW)
-            self.pool.encode(json.dumps(obj, separators=(",", ":")), out)
-            line = _deflate_raw_b64(bytes(out))
-            return [header, line] if header else line
+            return self._lines(header, self._encode_raw(_dumps(_loads_exact(raw_frame_str))))
 
         # Choose base_ts from the first event that has a numeric timestamp
         first_ts = None
@@ -350,45 +736,60 @@ class FrameCompressorV3:
                 break
 
         header = self._ensure_header(first_ts=first_ts)
-        # Drop 'market' and 'hash' to shrink payload
-        for ev in events:
-            if isinstance(ev, dict):
-                ev.pop("market", None)
-                ev.pop("hash", None)
+        # 'market'/'hash' need no stripping: the event encoders only read known fields
 
-        frame_line = self._encode_frame_events(events)
-        return [header, frame_line] if header else frame_line
+        try:
+            frame_line = self._encode_frame_events(events)
+        except Exception:
+            if header:
+                self._drop_header()  # the caller never sees this header line
+            raise
+        return self._lines(header, frame_line)
 
 
 # ---------- V3 Decoder (stateful) ----------
 
 class _V3State:
-    __slots__ = ("pool", "base_ts", "prev_ts", "asset_ids", "flags", "have_header")
-
-    def __init__(self):
-        self.pool = _StringPool()
+    __slots__ = ("pool", "version", "vdec", "base_ts", "prev_ts", "asset_ids", "flags", "have_header",
+                 "ts_i", "ts_s", "zdict", "zdict_in", "dco", "hist", "hist_len")
+
+    def __init__(self, zdict: Optional[bytes] = None):
+        self.zdict_in = zdict  # caller-supplied preset dictionary (kept across sessions)
+        self.zdict: Optional[bytes] = None  # active for the current session (header flag)
+        self.dco = None  # session decompressobj for stream-mode lines
+        # recent stream output (>= one window), to rebuild dco after a foreign line
+        self.hist: Deque[bytes] = deque()
+        self.hist_len: int = 0
+        self.version: int = 3
+        self.vdec = _uvarint_decode  # in-record varint decoder for this version
+        self.pool = _StringPool(self.vdec)
         self.base_ts: int = 0
         self.prev_ts: Optional[int] = None
         self.asset_ids: List[str] = []
         self.flags: int = 0
         self.have_header: bool = False
+        # last emitted timestamp and its string form (reused across a batch)
+        self.ts_i: Optional[int] = None
+        self.ts_s: str = ""
 
     def reset(self):
-        self.__init__()
+        self.__init__(self.zdict_in)
 
 
 def _decode_header(buf: bytes, i: int, st: _V3State) -> int:
     # 'H' [version] [flags] [base_ts] [asset_count] assets...
     ver, i = _uvarint_decode(buf, i)
-    if ver != 3:
+    if ver not in _SUPPORTED_VERSIONS:
         raise ValueError(f"Unsupported V3 version: {ver}")
+    st.version = ver
+    st.vdec = _pvarint_decode if ver >= 4 else _uvarint_decode
     flags, i = _uvarint_decode(buf, i)
     base_ts, i = _uvarint_decode(buf, i)
     st.base_ts = base_ts
     st.prev_ts = base_ts
     st.flags = flags
-    # reset pool for new session
-    st.pool.reset()
+    # fresh pool for new session
+    st.pool = _StringPool(st.vdec)
     # asset dict
     ac, i = _uvarint_decode(buf, i)
     st.asset_ids = []
@@ -398,20 +799,92 @@ def _decode_header(buf: bytes, i: int, st: _V3State) -> int:
             raise ValueError("asset id truncated")
         st.asset_ids.append(buf[i:i+ln].decode("utf-8"))
         i += ln
+    st.zdict = None
+    if flags & _H_ZDICT:
+        did, i = _uvarint_decode(buf, i)
+        if st.zdict_in is None or zdict_id(st.zdict_in) != did:
+            raise ValueError(f"log needs preset dictionary id {did:#010x} (pass it via zdict= / --dict)")
+        st.zdict = st.zdict_in
+    st.dco = None
+    st.hist.clear()
+    st.hist_len = 0
+    if flags & _H_STREAM:
+        st.dco = (zlib.decompressobj(wbits=-15, zdict=st.zdict) if st.zdict
+                  else zlib.decompressobj(wbits=-15))
     st.have_header = True
     return i
 
 
 def _dec_levels(buf: bytes, i: int, st: _V3State) -> Tuple[List[Dict[str, str]], int]:
-    n, i = _uvarint_decode(buf, i)
+    n, i = st.vdec(buf, i)
     out = []
+    dec = st.pool.decode  # hoisted: this loop runs per book level
     for _ in range(n):
-        p, i = st.pool.decode(buf, i)
-        s, i = st.pool.decode(buf, i)
+        p, i = dec(buf, i)
+        s, i = dec(buf, i)
         out.append({"price": p, "size": s})
     return out, i
 
 
+def _dec_book(buf: bytes, i: int, st: _V3State, tb: int, obj: Dict[str, Any]) -> int:
+    bids, i = _dec_levels(buf, i, st)
+    asks, i = _dec_levels(buf, i, st)
+    obj["bids"] = bids
+    obj["asks"] = asks
+    return i
+
+
+def _dec_price_change(buf: bytes, i: int, st: _V3State, tb: int, obj: Dict[str, Any]) -> int:
+    n, i = st.vdec(buf, i)
+    chs = []
+    dec = st.pool.decode
+    if st.version >= 4:
+        nb = (n + 7) >> 3
+        if i + nb > len(buf):
+            raise ValueError("sides truncated")
+        bits = int.from_bytes(buf[i:i+nb], "little")
+        i += nb
+        for k in range(n):
+            price, i = dec(buf, i)
+            size, i = dec(buf, i)
+            chs.append({"side": _SIDE_SELL if (bits >> k) & 1 else _SIDE_BUY, "price": price, "size": size})
+    else:
+        for _ in range(n):
+            side = _SIDE_SELL if buf[i] == 1 else _SIDE_BUY
+            i += 1
+            price, i = dec(buf, i)
+            size, i = dec(buf, i)
+            chs.append({"side": side, "price": price, "size": size})
+    obj["changes"] = chs
+    return i
+
+
+def _dec_tick_size_change(buf: bytes, i: int, st: _V3State, tb: int, obj: Dict[str, Any]) -> int:
+    old_tick, i = st.pool.decode(buf, i)
+    new_tick, i = st.pool.decode(buf, i)
+    obj["old_tick_size"] = old_tick
+    obj["new_tick_size"] = new_tick
+    return i
+
+
+def _dec_last_trade_price(buf: bytes, i: int, st: _V3State, tb: int, obj: Dict[str, Any]) -> int:
+    price, i = st.pool.decode(buf, i)
+    size, i = st.pool.decode(buf, i)
+    side = _SIDE_SELL if buf[i] == 1 else _SIDE_BUY
+    i += 1
+    obj["price"] = price
+    obj["size"] = size
+    obj["side"] = side
+    if (tb & _TB_OPT0) != 0:
+        fee, i = st.pool.decode(buf, i)
+        obj["fee_rate_bps"] = fee
+    return i
+
+
+# payload decoders indexed by et_code (see _ET_CODE)
+_DECODERS = (_dec_book, _dec_price_change, _dec_tick_size_change, _dec_last_trade_price)
+
+
 def _decode_event(buf: bytes, i: int, st: _V3State) -> Tuple[Dict[str, Any], int]:
     tb = buf[i]
     i += 1
@@ -420,124 +893,179 @@ def _decode_event(buf: bytes, i: int, st: _V3State) -> Tuple[Dict[str, Any], int
     et = _ET_FROM.get(et_code, None)
     if et is None:
         raise ValueError(f"Unknown event type code: {et_code}")
-    tsv, i = _uvarint_decode(buf, i)
+    tsv, i = st.vdec(buf, i)
     if ts_abs or st.prev_ts is None:
         ts = tsv
     else:
         ts = st.prev_ts + tsv
     st.prev_ts = ts
+    if ts != st.ts_i:
+        st.ts_i = ts
+        st.ts_s = str(ts)
 
     # build event
     obj: Dict[str, Any] = {
         "event_type": et,
         "asset_id": st.asset_ids[0] if st.asset_ids else "",  # single-asset mode
-        "timestamp": str(ts),
+        "timestamp": st.ts_s,
     }
 
-    if et == "book":
-        bids, i = _dec_levels(buf, i, st)
-        asks, i = _dec_levels(buf, i, st)
-        obj["bids"] = bids
-        obj["asks"] = asks
-    elif et == "price_change":
-        n, i = _uvarint_decode(buf, i)
-        chs = []
-        for _ in range(n):
-            side = "SELL" if buf[i] == 1 else "BUY"
-            i += 1
-            price, i = st.pool.decode(buf, i)
-            size, i = st.pool.decode(buf, i)
-            chs.append({"side": side, "price": price, "size": size})
-        obj["changes"] = chs
-    elif et == "tick_size_change":
-        old_tick, i = st.pool.decode(buf, i)
-        new_tick, i = st.pool.decode(buf, i)
-        obj["old_tick_size"] = old_tick
-        obj["new_tick_size"] = new_tick
-    elif et == "last_trade_price":
-        price, i = st.pool.decode(buf, i)
-        size, i = st.pool.decode(buf, i)
-        side = "SELL" if buf[i] == 1 else "BUY"
-        i += 1
-        obj["price"] = price
-        obj["size"] = size
-        obj["side"] = side
-        if (tb & _TB_OPT0) != 0:
-            fee, i = st.pool.decode(buf, i)
-            obj["fee_rate_bps"] = fee
-
+    i = _DECODERS[et_code](buf, i, st, tb, obj)
     return obj, i
 
 
-def _decode_frame(buf: bytes, i: int, st: _V3State) -> Tuple[str, int]:
-    # Return a JSON string for the whole frame (array of events)
-    cnt, i = _uvarint_decode(buf, i)
+def _decode_frame(buf: bytes, i: int, st: _V3State) -> Tuple[List[Dict[str, Any]], int]:
+    # Return the whole frame as a list of event dicts
+    cnt, i = st.vdec(buf, i)
     arr = []
     for _ in range(cnt):
         ev, i = _decode_event(buf, i, st)
         arr.append(ev)
-    return json.dumps(arr, separators=(",", ":")), i
+    return arr, i
 
 
 def _decode_raw(buf: bytes, i: int, st: _V3State) -> Tuple[str, int]:
-    s, i = st.pool.decode(buf, i)
-    return json.dumps(s, separators=(",", ":")), i
+    return st.pool.decode(buf, i)
+
+
+def _decode_records(buf: bytes, st: _V3State) -> Optional[List[Any]]:
+    out: List[Any] = []
+    i = 0
+    n = len(buf)
+    while i < n:
+        kind = buf[i]
+        i += 1
+        if kind == _REC_HEADER:
+            i = _decode_header(buf, i, st)  # header produces no output
+        elif kind == _REC_FRAME:
+            arr, i = _decode_frame(buf, i, st)
+            out.append(arr)
+        elif kind == _REC_RAW:
+            raw, i = _decode_raw(buf, i, st)
+            out.append(raw)
+        elif i == 1:
+            # looks like raw-deflate but unknown record kind: treat as not V3
+            return None
+        else:
+            raise ValueError(f"Unknown V3 record kind: {kind:#x}")
+    return out
+
 
+def _decode_stream_chunk(data: bytes, st: _V3State) -> Optional[List[Any]]:
+    """
+    Inflate the next sync-flushed chunk on the session's live decompressobj.
+    If it doesn't decode (a foreign line), rebuild the stream state from the
+    last window of output and undo the pool/timestamp changes; None = not V3.
+    """
+    pool_mark = st.pool._next
+    prev_ts = st.prev_ts
+    try:
+        buf = st.dco.decompress(data + _SYNC_TAIL)
+        out = _decode_records(buf, st) if buf else None
+    except Exception:
+        out = None
+    if out is None:
+        window = b"".join(st.hist)
+        if st.zdict:
+            window = st.zdict + window
+        window = window[-_WINDOW:]
+        # at a sync-flush boundary the inflate state is just its window
+        st.dco = zlib.decompressobj(wbits=-15, zdict=window) if window else zlib.decompressobj(wbits=-15)
+        st.pool.truncate(pool_mark)
+        st.prev_ts = prev_ts
+        return None
+    hist = st.hist
+    hist.append(buf)
+    st.hist_len += len(buf)
+    while st.hist_len - len(hist[0]) >= _WINDOW:
+        st.hist_len -= len(hist.popleft())
+    return out
 
-def _try_decode_v3_line(token: str, st: _V3State) -> Optional[List[str]]:
+
+def _try_decode_v3_line(token: str, st: _V3State) -> Optional[List[Any]]:
     """
     Try to interpret 'token' as V3 base64 (raw DEFLATE). Returns a list of
-    zero or more JSON strings produced by this line, or None if not V3.
+    zero or more values (event lists or raw strings) produced by this line,
+    or None if not V3. A line carries one or more back-to-back records
+    (batched writers).
     """
     try:
-        buf = _inflate_raw_b64(token)
+        data = _b64dec(token.encode("ascii"))
+        if (st.dco is not None and not data[0] & 1
+                and (len(data) + 2) // 3 * 4 == len(token)):
+            # stream-mode line: next chunk of the session's DEFLATE stream.
+            # Its first block is never final (BFINAL=0), unlike a one-shot line
+            # such as the next header; and the length check makes sure the
+            # lenient base64 decoder dropped no characters (e.g. of JSON text).
+            return _decode_stream_chunk(data, st)
+        buf = _inflate_raw(data, st.zdict)
     except Exception:
         return None  # not V3
     if not buf:
         return None
-    i = 0
-    kind = buf[i]
-    i += 1
-    if kind == _REC_HEADER:
-        _decode_header(buf, i, st)
-        return []  # header produces no JSON output
-    elif kind == _REC_FRAME:
-        js, _ = _decode_frame(buf, i, st)
-        return [js]
-    elif kind == _REC_RAW:
-        js, _ = _decode_raw(buf, i, st)
-        return [js]
-    else:
-        # looks like raw-deflate but unknown record kind: treat as not V3
-        return None
+    return _decode_records(buf, st)
 
 # ---------- Legacy/tolerant paths (for mixed logs) ----------
 
+class _JsonText(str):
+    """Already-serialized JSON copied through verbatim (vs. a decoded str value)."""
+    __slots__ = ()
+
+
 def _strip_keys(d: Union[Dict[str, Any], List[Any], Any]) -> Any:
-    if isinstance(d, dict):
-        return {k: _strip_keys(v) for k, v in d.items() if k not in {"market", "hash"}}
-    if isinstance(d, list):
-        return [_strip_keys(x) for x in d]
+    """Drop 'market'/'hash' throughout a freshly parsed JSON tree, in place."""
+    stack = [d]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        x = pop()
+        if isinstance(x, dict):
+            x.pop("market", None)
+            x.pop("hash", None)
+            push(x.values())
+        elif isinstance(x, list):
+            push(x)
     return d
 
-def _maybe_json_value(line: str) -> Optional[str]:
+# Sniff for pruned keys in key position; a hit only means "take the slow path".
+_BANNED_KEY_RE = re.compile(r'"(?:market|hash)"\s*:')
+
+def _has_banned_key(s: str) -> bool:
+    return _BANNED_KEY_RE.search(s) is not None
+
+def _json_text(txt: str, canonical: bool = False, as_objects: bool = False) -> Any:
+    """
+    Return the JSON document 'txt' with 'market'/'hash' pruned: either as
+    _JsonText to copy through, or as the parsed (pruned) value. The text is
+    always parsed (so malformed input still raises); it is only handed back
+    as a parsed value when something must be pruned, it spans lines,
+    canonical output was requested, or the caller wants objects.
+    """
+    obj = _loads(txt)
+    if as_objects or canonical or "\n" in txt or "\r" in txt or _has_banned_key(txt):
+        if _HAS_ORJSON and _has_wide_float(obj):
+            obj = json.loads(txt)  # see _loads_exact
+        return _strip_keys(obj)
+    return _JsonText(txt.strip())
+
+def _maybe_json_value(line: str, canonical: bool = False, as_objects: bool = False) -> Optional[Any]:
     s = line.strip()
     if not s:
         return None
     if s[0] in "{[":
         try:
-            return json.dumps(_strip_keys(json.loads(s)), separators=(",", ":"))
+            return _json_text(s, canonical, as_objects)
         except Exception:
             return None
     if s[0] == '"':
         try:
-            inner = json.loads(s)
+            inner = _loads_exact(s)
             if isinstance(inner, str) and inner and inner[0] in "[{":
                 try:
-                    return json.dumps(_strip_keys(json.loads(inner)), separators=(",", ":"))
+                    return _json_text(inner, canonical, as_objects)
                 except Exception:
-                    return json.dumps(inner, separators=(",", ":"))
-            return json.dumps(inner, separators=(",", ":"))
+                    return inner
+            return inner
         except Exception:
             return None
     return None
@@ -545,8 +1073,8 @@ def _maybe_json_value(line: str) -> Optional[str]:
 def _iter_any_entries(path: str):
     # Try read as JSON array
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(path, "rb") as f:
+            data = _loads_exact(f.read())
         if isinstance(data, list):
             for it in data:
                 yield it
@@ -560,92 +1088,172 @@ def _iter_any_entries(path: str):
             if s:
                 yield s
 
-# ---------- Public file reinflater ----------
-
-def reinflate_file(input_path: str, output_path: str, ndjson: bool = True) -> None:
+def _entry_values(entry: Any, st: _V3State, canonical: bool, as_objects: bool) -> Iterator[Any]:
     """
-    Read a (possibly mixed) log file and write reconstructed JSON:
-      - V3 lines: require the header; emit arrays or strings per frame.
-      - Legacy lines: JSONL wrappers or base64 zlib JSON — all tolerated.
+    Yield the reconstructed values of one log entry as Python objects, or as
+    _JsonText for legacy JSON passed through verbatim (never when as_objects=True).
     """
-    st = _V3State()
+    # 1) If entry is a dict (JSONL wrapper), normalize
+    if isinstance(entry, dict):
+        if "c" in entry:
+            maybe = _try_decode_v3_line(entry["c"], st)
+            if maybe is not None:
+                yield from maybe
+                return
+            # legacy compact (zlib+base64 JSON array)
+            try:
+                raw = _b64dec(entry["c"].encode("ascii"))
+                txt = zlib.decompress(raw).decode("utf-8")
+                yield _json_text(txt, canonical, as_objects)
+                return
+            except Exception:
+                pass
+        if "compressed" in entry:
+            maybe = _try_decode_v3_line(entry["compressed"], st)
+            if maybe is not None:
+                yield from maybe
+                return
+        if "m" in entry:
+            m = entry["m"]
+            if isinstance(m, dict) and "_raw" in m and isinstance(m["_raw"], str):
+                yield m["_raw"]
+            else:
+                yield _strip_keys(m)
+            return
+        # Unknown wrapper; pass through (pruned)
+        yield _strip_keys(entry)
+        return
+
+    # 2) Raw string line: try V3 first
+    if isinstance(entry, str):
+        maybe = _try_decode_v3_line(entry, st)
+        if maybe is not None:
+            yield from maybe
+            return
 
-    def yield_json_values():
+        # Legacy: maybe base64 zlib of JSON
+        try:
+            raw = _b64dec(entry.encode("ascii"))
+            txt = zlib.decompress(raw).decode("utf-8")
+            yield _json_text(txt, canonical, as_objects)
+            return
+        except Exception:
+            pass
+
+        # Maybe the line is JSON (or JSON string containing JSON)
+        mjs = _maybe_json_value(entry, canonical, as_objects)
+        if mjs is not None:
+            yield mjs
+            return
+
+        # Fallback: plain string as JSON string
+        yield entry
+        return
+
+    # 3) Other JSON values from array input
+    yield _strip_keys(entry)
+
+
+def _starts_session(entry: Any) -> bool:
+    """Cheap peek: does this entry hold a V3 header record (new, independent session)?"""
+    if isinstance(entry, dict):
+        entry = entry.get("c", entry.get("compressed"))
+    if not isinstance(entry, str):
+        return False
+    return _is_header_token(entry)
+
+def _iter_sessions(input_path: str) -> Iterator[List[Any]]:
+    """Group entries into runs that each begin at a V3 header (the first may not)."""
+    seg: List[Any] = []
+    for entry in _iter_any_entries(input_path):
+        if seg and _starts_session(entry):
+            yield seg
+            seg = []
+        seg.append(entry)
+    if seg:
+        yield seg
+
+def _decode_session(entries: List[Any], canonical: bool, as_objects: bool,
+                    zdict: Optional[bytes] = None) -> List[Any]:
+    st = _V3State(zdict)
+    out: List[Any] = []
+    for entry in entries:
+        out.extend(_entry_values(entry, st, canonical, as_objects))
+    return out
+
+def _iter_values(input_path: str, canonical: bool = False, as_objects: bool = False,
+                 workers: int = 1, zdict: Optional[bytes] = None) -> Iterator[Any]:
+    """
+    Yield every reconstructed value in 'input_path' (see _entry_values).
+
+    With workers > 1, independent V3 sessions (a header resets all decoder
+    state) are decoded on a thread pool and yielded back in input order.
+    """
+    if workers <= 1:
+        st = _V3State(zdict)
         for entry in _iter_any_entries(input_path):
-            # 1) If entry is a dict (JSONL wrapper), normalize
-            if isinstance(entry, dict):
-                if "c" in entry:
-                    maybe = _try_decode_v3_line(entry["c"], st)
-                    if maybe is not None:
-                        for x in maybe:
-                            yield x
-                        continue
-                    # legacy compact (zlib+base64 JSON array)
-                    try:
-                        raw = base64.urlsafe_b64decode(entry["c"].encode("ascii"))
-                        txt = zlib.decompress(raw).decode("utf-8")
-                        yield json.dumps(_strip_keys(json.loads(txt)), separators=(",", ":"))
-                        continue
-                    except Exception:
-                        pass
-                if "compressed" in entry:
-                    maybe = _try_decode_v3_line(entry["compressed"], st)
-                    if maybe is not None:
-                        for x in maybe:
-                            yield x
-                        continue
-                if "m" in entry:
-                    m = entry["m"]
-                    if isinstance(m, dict) and "_raw" in m and isinstance(m["_raw"], str):
-                        yield json.dumps(m["_raw"], separators=(",", ":"))
-                    else:
-                        yield json.dumps(_strip_keys(m), separators=(",", ":"))
-                    continue
-                # Unknown wrapper; pass through (pruned)
-                yield json.dumps(_strip_keys(entry), separators=(",", ":"))
-                continue
-
-            # 2) Raw string line: try V3 first
-            if isinstance(entry, str):
-                maybe = _try_decode_v3_line(entry, st)
-                if maybe is not None:
-                    for x in maybe:
-                        yield x
-                    continue
+            yield from _entry_values(entry, st, canonical, as_objects)
+        return
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for seg in _iter_sessions(input_path):
+            pending.append(ex.submit(_decode_session, seg, canonical, as_objects, zdict))
+            if len(pending) >= 2 * workers:  # bound the sessions held in memory
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
-                # Legacy: maybe base64 zlib of JSON
-                try:
-                    raw = base64.urlsafe_b64decode(entry.encode("ascii"))
-                    txt = zlib.decompress(raw).decode("utf-8")
-                    yield json.dumps(_strip_keys(json.loads(txt)), separators=(",", ":"))
-                    continue
-                except Exception:
-                    pass
+# ---------- Public file reinflater ----------
 
-                # Maybe the line is JSON (or JSON string containing JSON)
-                mjs = _maybe_json_value(entry)
-                if mjs is not None:
-                    yield mjs
-                    continue
+_WRITE_BATCH = 1024       # NDJSON values joined per write() call
+_WRITE_BUFFER = 1 << 20   # output file buffer (bytes)
 
-                # Fallback: plain string as JSON string
-                yield json.dumps(entry, separators=(",", ":"))
-                continue
+def reinflate_file_objects(input_path: str, workers: int = 1,
+                           zdict: Optional[bytes] = None) -> Iterator[Any]:
+    """
+    Like reinflate_file, but yield the reconstructed values as Python objects
+    (event lists, raw strings, legacy JSON values) without serializing them.
+    """
+    return _iter_values(input_path, as_objects=True, workers=workers, zdict=zdict)
 
-            # 3) Other JSON values from array input
-            yield json.dumps(_strip_keys(entry), separators=(",", ":"))
 
-    if ndjson:
-        with open(output_path, "w", encoding="utf-8") as out:
+def reinflate_file(input_path: str, output_path: str, ndjson: bool = True,
+                   canonical: bool = False, workers: int = 1, zdict: Optional[bytes] = None) -> None:
+    """
+    Read a (possibly mixed) log file and write reconstructed JSON:
+      - V3 lines: require the header; emit arrays or strings per frame.
+      - Legacy lines: JSONL wrappers or base64 zlib JSON — all tolerated.
+    Legacy JSON text without 'market'/'hash' keys is passed through as-is;
+    set canonical=True to re-serialize it compactly instead.
+    workers > 1 decodes independent V3 sessions in parallel (output order is kept).
+    zdict is the preset dictionary the log was written with, if any.
+    """
+    def yield_json_values():
+        # serialize only at the write step, straight to UTF-8 bytes
+        for x in _iter_values(input_path, canonical, workers=workers, zdict=zdict):
+            yield x.encode("utf-8") if type(x) is _JsonText else _dumpb(x)
+
+    with open(output_path, "wb", buffering=_WRITE_BUFFER) as out:
+        if ndjson:
+            batch: List[bytes] = []
+            for js in yield_json_values():
+                batch.append(js)
+                if len(batch) >= _WRITE_BATCH:
+                    batch.append(b"")  # trailing newline
+                    out.write(b"\n".join(batch))
+                    batch.clear()
+            if batch:
+                batch.append(b"")
+                out.write(b"\n".join(batch))
+        else:
+            # stream the array so memory stays flat on large logs
+            out.write(b"[")
+            sep = b""
             for js in yield_json_values():
+                out.write(sep)
                 out.write(js)
-                out.write("\n")
-    else:
-        values = list(yield_json_values())
-        with open(output_path, "w", encoding="utf-8") as out:
-            out.write("[")
-            out.write(",".join(values))
-            out.write("]")
+                sep = b","
+            out.write(b"]")
 
 
 # ---------- CLI ----------
@@ -655,5 +1263,17 @@ if __name__ == "__main__":
     ap.add_argument("--out", dest="output_path", required=True, help="output file path")
     ap.add_argument("--array", action="store_true",
                     help="write a single JSON array instead of NDJSON")
+    ap.add_argument("--canonical", action="store_true",
+                    help="re-serialize legacy JSON compactly even when nothing is pruned")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="decode independent V3 sessions on N threads (0 = one per CPU; default: 1)")
+    ap.add_argument("--dict", dest="dict_path", default=None,
+                    help="preset DEFLATE dictionary the log was written with (see train_dict.py)")
     args = ap.parse_args()
-    reinflate_file(args.input_path, args.output_path, ndjson=not args.array)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    zdict = None
+    if args.dict_path:
+        with open(args.dict_path, "rb") as f:
+            zdict = f.read()
+    reinflate_file(args.input_path, args.output_path, ndjson=not args.array,
+                   canonical=args.canonical, workers=workers, zdict=zdict)
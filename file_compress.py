@@ -3,14 +3,20 @@
 Lossless post-compression for Polymarket V3 logs (or any file).
 
 Features (in priority order):
-1) System 7-Zip CLI (7z/7za/7zr/7zz) with Ultra LZMA2, solid archive, large dictionary.
-2) Pure-Python 7z via py7zr if CLI is unavailable.
-3) Built-in .xz fallback (lzma) if neither 7z CLI nor py7zr is available.
+1) System zstd CLI (-19 --long=27 -T0): ~7z ratio on repetitive logs, far faster both ways.
+2) System 7-Zip CLI (7z/7za/7zr/7zz) with Ultra LZMA2, solid archive, large dictionary.
+3) Pure-Python 7z via py7zr if CLI is unavailable.
+4) zstd via the zstandard package if no CLI is available.
+5) Built-in .xz fallback (lzma) if nothing else is available.
+Passwords need 7z; with --password, auto skips the zstd backends.
 
 CLI examples:
-  # Compress with the best available method (prefers 7z Ultra)
+  # Compress with the best available method (prefers zstd, then 7z Ultra)
   python archive_logs.py compress --in updates.v3
-  # -> produces updates.v3.7z (or updates.v3.xz as a fallback)
+  # -> produces updates.v3.zst (or updates.v3.7z / updates.v3.xz as fallbacks)
+
+  # Use zstd explicitly (CLI, else the zstandard package)
+  python archive_logs.py compress --in updates.v3 --method zstd
 
   # Decompress back
   python archive_logs.py decompress --in updates.v3.7z --out-dir ./restored
@@ -24,18 +30,22 @@ CLI examples:
   # Use .xz (built-in lzma)
   python archive_logs.py compress --in updates.v3 --method xz
 
+  # Several logs into one solid .7z (one 7z process; cross-file matches)
+  python archive_logs.py compress --in day1.v3 day2.v3 day3.v3 --out week.7z
+
 All methods are strictly LOSSLESS.
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
 import os
 import sys
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 
 # Optional: pure-Python 7z library
 try:
@@ -44,6 +54,13 @@ try:
 except Exception:
     _HAS_PY7ZR = False
 
+# Optional: zstd bindings (pip install zstandard)
+try:
+    import zstandard  # type: ignore
+    _HAS_ZSTANDARD = True
+except Exception:
+    _HAS_ZSTANDARD = False
+
 import lzma  # built-in .xz fallback
 
 
@@ -51,8 +68,11 @@ import lzma  # built-in .xz fallback
 # Utilities
 # ------------------------------
 
+@functools.lru_cache(maxsize=1)
 def _find_7z_exe() -> Optional[str]:
     """Return a path to a 7-Zip CLI if available on PATH, else None."""
+    # Cached for the process lifetime; call _find_7z_exe.cache_clear() after
+    # installing 7-Zip or changing PATH at runtime.
     for name in ("7z", "7za", "7zr", "7zz"):  # support common 7z binaries
         p = shutil.which(name)
         if p:
@@ -60,13 +80,46 @@ def _find_7z_exe() -> Optional[str]:
     return None
 
 
+@functools.lru_cache(maxsize=1)
+def _find_zstd_exe() -> Optional[str]:
+    """Return a path to the zstd CLI if available on PATH, else None (cached like _find_7z_exe)."""
+    return shutil.which("zstd")
+
+
+# Stream copy chunk for the xz paths (matches the typical LZMA2 dictionary size)
+_COPY_CHUNK = 64 * 1024 * 1024
+
+
+def _fadvise_sequential(fh) -> None:
+    """Hint the kernel that fh will be read front to back (larger read-ahead); no-op if unsupported."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except Exception:
+            pass
+
+
 def _ensure_parent_dir(p: Path) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _resolve_inputs(input_paths: Sequence[str]) -> Tuple[Path, List[str]]:
+    """Resolve several input files to (common parent dir, paths relative to it)."""
+    if not input_paths:
+        raise ValueError("no input files given")
+    ips = [Path(p).resolve() for p in input_paths]
+    for ip in ips:
+        if not ip.is_file():
+            raise FileNotFoundError(f"Input file not found: {ip}")
+    base = Path(os.path.commonpath([str(ip.parent) for ip in ips]))
+    return base, [str(ip.relative_to(base)) for ip in ips]
+
+
 def _derive_archive_path(input_path: Path, method: str) -> Path:
     if method == "xz":
         return input_path.with_name(input_path.name + ".xz")
+    if method == "zstd":
+        return input_path.with_name(input_path.name + ".zst")
     # default to .7z
     return input_path.with_name(input_path.name + ".7z")
 
@@ -82,10 +135,12 @@ def compress_with_7z_cli(
     dict_size_mb: int = 256,
     solid: bool = True,
     password: Optional[str] = None,
+    threads: Optional[int] = None,
 ) -> Path:
     """
     Compress a single file using the system 7z binary with ULTRA settings.
     - LZMA2, solid blocks, maximum compression, large dictionary, multi-threaded.
+    - threads: explicit LZMA2 thread count (default: os.cpu_count()).
     - If password is provided, headers are encrypted too (-mhe=on).
 
     Returns the Path to the created .7z file.
@@ -101,13 +156,69 @@ def compress_with_7z_cli(
     ap = Path(archive_path).resolve() if archive_path else _derive_archive_path(ip, "7z")
     _ensure_parent_dir(ap)
 
+    cmd = _7z_add_cmd(sevenzip, dict_size_mb=dict_size_mb, solid=solid, password=password, threads=threads)
+    cmd += [str(ap), ip.name]
+
+    # Run from the file's directory so only the basename is stored in the archive.
+    print(f"[7z-cli] {' '.join(cmd)}  (cwd={ip.parent})", file=sys.stderr)
+    subprocess.run(cmd, cwd=str(ip.parent), check=True)
+    return ap
+
+
+def compress_many_with_7z_cli(
+    input_paths: Sequence[str],
+    archive_path: str,
+    *,
+    dict_size_mb: int = 256,
+    solid: bool = True,
+    password: Optional[str] = None,
+    threads: Optional[int] = None,
+) -> Path:
+    """
+    Compress several files into ONE .7z archive with a single 7z process
+    (same Ultra settings as compress_with_7z_cli). In solid mode, LZMA2 also
+    matches across files, so similar logs usually compress better together.
+    Files are stored relative to their common parent directory.
+
+    Returns the Path to the created .7z file.
+    """
+    sevenzip = _find_7z_exe()
+    if not sevenzip:
+        raise RuntimeError("7z CLI not found on PATH")
+
+    base, rels = _resolve_inputs(input_paths)
+    ap = Path(archive_path).resolve()
+    _ensure_parent_dir(ap)
+
+    cmd = _7z_add_cmd(sevenzip, dict_size_mb=dict_size_mb, solid=solid, password=password, threads=threads)
+    cmd += [str(ap), *rels]
+
+    print(f"[7z-cli] {' '.join(cmd)}  (cwd={base})", file=sys.stderr)
+    subprocess.run(cmd, cwd=str(base), check=True)
+    return ap
+
+
+def _7z_add_cmd(
+    sevenzip: str,
+    *,
+    dict_size_mb: int,
+    solid: bool,
+    password: Optional[str],
+    threads: Optional[int],
+) -> List[str]:
+    """7z 'a' command up to (not including) the archive and input names."""
+    if threads is None:
+        threads = os.cpu_count() or 1
+
     # Build 7z command (Ultra LZMA2)
     # -mx=9 : Ultra
     # -m0=lzma2 : use LZMA2
     # -md=256m : dictionary size
     # -mfb=273 : number of fast bytes (max)
     # -ms=on/off : solid archive
-    # -mmt=on : multithread
+    # -mmt=N : N threads (a bare "on" lets some builds cap LZMA2 at 2).
+    #          LZMA2 splits work into dictionary-sized chunks, so threads beyond
+    #          (input size / chunk size) give diminishing returns.
     # -bd : disable progress
     # -y : assume yes on all queries
     cmd = [
@@ -116,7 +227,7 @@ def compress_with_7z_cli(
         "-m0=lzma2",
         f"-md={int(dict_size_mb)}m",
         "-mfb=273",
-        "-mmt=on",
+        f"-mmt={max(1, int(threads))}",
         "-bd",
         "-y",
     ]
@@ -124,13 +235,7 @@ def compress_with_7z_cli(
 
     if password:
         cmd += [f"-p{password}", "-mhe=on"]  # encrypt headers (hide filenames)
-
-    cmd += [str(ap), ip.name]
-
-    # Run from the file's directory so only the basename is stored in the archive.
-    print(f"[7z-cli] {' '.join(cmd)}  (cwd={ip.parent})", file=sys.stderr)
-    subprocess.run(cmd, cwd=str(ip.parent), check=True)
-    return ap
+    return cmd
 
 
 def decompress_with_7z_cli(
@@ -190,20 +295,12 @@ def compress_with_py7zr(
     ap = Path(archive_path).resolve() if archive_path else _derive_archive_path(ip, "7z")
     _ensure_parent_dir(ap)
 
-    # LZMA2 filter with large dictionary and 'preset' 9 (ultra-like).
-    # Note: available keys may vary by py7zr version; the below works broadly.
-    filters = [{
-        "id": py7zr.FILTER_LZMA2,
-        "preset": 9,
-        "dict_size": int(dict_size_mb) * 1024 * 1024,
-    }]
-
     # Header encryption (hide filenames) when password is set.
     header_encryption = bool(password)
 
     print(f"[py7zr] writing {ap}", file=sys.stderr)
     with py7zr.SevenZipFile(str(ap), mode="w",
-                            filters=filters,
+                            filters=_py7zr_filters(dict_size_mb),
                             password=password,
                             header_encryption=header_encryption) as z:
         # Store only the basename inside the archive.
@@ -211,6 +308,47 @@ def compress_with_py7zr(
     return ap
 
 
+def compress_many_with_py7zr(
+    input_paths: Sequence[str],
+    archive_path: str,
+    *,
+    dict_size_mb: int = 256,
+    password: Optional[str] = None,
+) -> Path:
+    """
+    Compress several files into ONE solid .7z archive in-process (one
+    SevenZipFile, no per-file setup). Files are stored relative to their
+    common parent directory.
+
+    Returns the Path to the created .7z file.
+    """
+    if not _HAS_PY7ZR:
+        raise RuntimeError("py7zr not installed (pip install py7zr)")
+
+    base, rels = _resolve_inputs(input_paths)
+    ap = Path(archive_path).resolve()
+    _ensure_parent_dir(ap)
+
+    print(f"[py7zr] writing {ap} ({len(rels)} files)", file=sys.stderr)
+    with py7zr.SevenZipFile(str(ap), mode="w",
+                            filters=_py7zr_filters(dict_size_mb),
+                            password=password,
+                            header_encryption=bool(password)) as z:
+        for rel in rels:
+            z.write(str(base / rel), arcname=rel)
+    return ap
+
+
+def _py7zr_filters(dict_size_mb: int) -> list:
+    # LZMA2 filter with large dictionary and 'preset' 9 (ultra-like).
+    # Note: available keys may vary by py7zr version; the below works broadly.
+    return [{
+        "id": py7zr.FILTER_LZMA2,
+        "preset": 9,
+        "dict_size": int(dict_size_mb) * 1024 * 1024,
+    }]
+
+
 def decompress_with_py7zr(
     archive_path: str,
     out_dir: str = ".",
@@ -237,6 +375,142 @@ def decompress_with_py7zr(
     return outp
 
 
+# ------------------------------
+# zstd via system CLI / zstandard
+# ------------------------------
+
+def _strip_zst(ap: Path, outp: Path) -> Path:
+    return outp / ap.name[:-4] if ap.name.lower().endswith(".zst") else outp / (ap.name + ".out")
+
+
+def compress_with_zstd_cli(
+    input_path: str,
+    archive_path: Optional[str] = None,
+    *,
+    level: int = 19,
+    long_window: int = 27,  # log2 of the match window: 27 = 128 MiB
+    threads: Optional[int] = None,  # None/0 = all cores (-T0)
+) -> Path:
+    """
+    Compress a single file to .zst using the system zstd binary.
+    - long-distance matching over a large window suits repetitive JSONL logs.
+    Returns the Path to the created .zst file.
+    """
+    zstd = _find_zstd_exe()
+    if not zstd:
+        raise RuntimeError("zstd CLI not found on PATH")
+
+    ip = Path(input_path).resolve()
+    if not ip.is_file():
+        raise FileNotFoundError(f"Input file not found: {ip}")
+
+    ap = Path(archive_path).resolve() if archive_path else _derive_archive_path(ip, "zstd")
+    _ensure_parent_dir(ap)
+
+    # -q : quiet, -f : overwrite, --ultra : required above level 19
+    cmd = [zstd, f"-{int(level)}", f"--long={int(long_window)}", f"-T{int(threads or 0)}", "-q", "-f"]
+    if level > 19:
+        cmd.insert(1, "--ultra")
+    cmd += [str(ip), "-o", str(ap)]
+
+    print(f"[zstd-cli] {' '.join(cmd)}", file=sys.stderr)
+    subprocess.run(cmd, check=True)
+    return ap
+
+
+def decompress_with_zstd_cli(
+    archive_path: str,
+    out_dir: str = ".",
+    *,
+    long_window: int = 27,
+) -> Path:
+    """
+    Decompress a .zst file with the system zstd binary, restoring the name by stripping .zst.
+    Returns the path to the decompressed file.
+    """
+    zstd = _find_zstd_exe()
+    if not zstd:
+        raise RuntimeError("zstd CLI not found on PATH")
+
+    ap = Path(archive_path).resolve()
+    if not ap.exists():
+        raise FileNotFoundError(f"Archive not found: {ap}")
+
+    outp = Path(out_dir).resolve()
+    outp.mkdir(parents=True, exist_ok=True)
+    out_file = _strip_zst(ap, outp)
+
+    # --long must be at least the window used at compression time
+    cmd = [zstd, "-d", f"--long={int(long_window)}", "-q", "-f", str(ap), "-o", str(out_file)]
+    print(f"[zstd-cli] {' '.join(cmd)}", file=sys.stderr)
+    subprocess.run(cmd, check=True)
+    return out_file
+
+
+def compress_with_zstandard(
+    input_path: str,
+    archive_path: Optional[str] = None,
+    *,
+    level: int = 22,
+    long_window: int = 27,
+    threads: int = -1,  # -1 = all cores
+) -> Path:
+    """
+    Compress a single file to .zst using the zstandard package (same framing as the CLI).
+    Returns the Path to the created .zst file.
+    """
+    if not _HAS_ZSTANDARD:
+        raise RuntimeError("zstandard not installed (pip install zstandard)")
+
+    ip = Path(input_path).resolve()
+    if not ip.is_file():
+        raise FileNotFoundError(f"Input file not found: {ip}")
+
+    ap = Path(archive_path).resolve() if archive_path else _derive_archive_path(ip, "zstd")
+    _ensure_parent_dir(ap)
+
+    # all settings go through the parameters object (ZstdCompressor rejects mixing)
+    params = zstandard.ZstdCompressionParameters.from_level(
+        level, window_log=long_window, enable_ldm=True, threads=threads, write_content_size=1)
+    cctx = zstandard.ZstdCompressor(compression_params=params)
+
+    print(f"[zstandard] writing {ap} (level={level})", file=sys.stderr)
+    with open(ip, "rb") as src, open(ap, "wb") as fh:
+        _fadvise_sequential(src)
+        with cctx.stream_writer(fh, size=ip.stat().st_size, closefd=False) as dst:
+            shutil.copyfileobj(src, dst, 1 << 23)
+    return ap
+
+
+def decompress_with_zstandard(
+    archive_path: str,
+    out_dir: str = ".",
+    *,
+    long_window: int = 27,
+) -> Path:
+    """
+    Decompress a .zst file using the zstandard package, restoring the name by stripping .zst.
+    Returns the path to the decompressed file.
+    """
+    if not _HAS_ZSTANDARD:
+        raise RuntimeError("zstandard not installed (pip install zstandard)")
+
+    ap = Path(archive_path).resolve()
+    if not ap.exists():
+        raise FileNotFoundError(f"Archive not found: {ap}")
+
+    outp = Path(out_dir).resolve()
+    outp.mkdir(parents=True, exist_ok=True)
+    out_file = _strip_zst(ap, outp)
+
+    print(f"[zstandard] extracting {ap} -> {out_file}", file=sys.stderr)
+    dctx = zstandard.ZstdDecompressor(max_window_size=1 << int(long_window))
+    with open(ap, "rb") as src, open(out_file, "wb") as dst:
+        _fadvise_sequential(src)
+        dctx.copy_stream(src, dst, read_size=1 << 23, write_size=1 << 23)
+    return out_file
+
+
 # ------------------------------
 # .xz via built-in lzma (fallback 2)
 # ------------------------------
@@ -266,21 +540,14 @@ def compress_with_xz(
         # Optional: use a block size to improve ratio on huge files (platform dependent).
         filters = [{"id": lzma.FILTER_LZMA2, "preset": preset, "dict_size": block_size_mb * 1024 * 1024}]
 
-    CHUNK = 8 * 1024 * 1024
     if filters is None:
         with open(ip, "rb") as src, lzma.open(ap, "wb", preset=preset, format=lzma.FORMAT_XZ) as dst:
-            while True:
-                b = src.read(CHUNK)
-                if not b:
-                    break
-                dst.write(b)
+            _fadvise_sequential(src)
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
     else:
         with open(ip, "rb") as src, lzma.LZMAFile(ap, "wb", format=lzma.FORMAT_XZ, filters=filters) as dst:
-            while True:
-                b = src.read(CHUNK)
-                if not b:
-                    break
-                dst.write(b)
+            _fadvise_sequential(src)
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
     return ap
 
 
@@ -302,13 +569,9 @@ def decompress_xz(
     out_file = outp / ap.name[:-3] if ap.name.lower().endswith(".xz") else outp / (ap.name + ".out")
 
     print(f"[xz] extracting {ap} -> {out_file}", file=sys.stderr)
-    CHUNK = 8 * 1024 * 1024
-    with lzma.open(ap, "rb") as src, open(out_file, "wb") as dst:
-        while True:
-            b = src.read(CHUNK)
-            if not b:
-                break
-            dst.write(b)
+    with open(ap, "rb") as raw, lzma.open(raw, "rb") as src, open(out_file, "wb") as dst:
+        _fadvise_sequential(raw)
+        shutil.copyfileobj(src, dst, _COPY_CHUNK)
     return out_file
 
 
@@ -320,15 +583,18 @@ def compress_file(
     input_path: str,
     archive_path: Optional[str] = None,
     *,
-    method: str = "auto",          # "auto" | "7z" | "py7zr" | "xz"
+    method: str = "auto",          # "auto" | "zstd" | "7z" | "py7zr" | "xz"
     password: Optional[str] = None,
     dict_size_mb: int = 256,
     solid: bool = True,
+    threads: Optional[int] = None,  # 7z/zstd CLIs; default all CPUs
 ) -> Path:
     """
     Compress a file with the best available lossless method.
 
-    - method="auto": prefer system 7z CLI -> py7zr -> xz
+    - method="auto": prefer zstd CLI -> system 7z CLI -> py7zr -> zstandard -> xz
+                     (zstd is skipped when a password is given)
+    - method="zstd": zstd CLI, else the zstandard package (.zst; no passwords)
     - method="7z"  : require system 7z CLI
     - method="py7zr": require py7zr
     - method="xz"  : built-in lzma (.xz stream)
@@ -336,11 +602,19 @@ def compress_file(
     Returns the Path to the created archive.
     """
     method = method.lower()
-    if method not in {"auto", "7z", "py7zr", "xz"}:
-        raise ValueError("method must be one of: auto, 7z, py7zr, xz")
+    if method not in {"auto", "zstd", "7z", "py7zr", "xz"}:
+        raise ValueError("method must be one of: auto, zstd, 7z, py7zr, xz")
+
+    if method == "zstd":
+        if password:
+            raise ValueError(".zst does not support passwords")
+        if _find_zstd_exe():
+            return compress_with_zstd_cli(input_path, archive_path, threads=threads)
+        return compress_with_zstandard(input_path, archive_path)
 
     if method == "7z":
-        return compress_with_7z_cli(input_path, archive_path, dict_size_mb=dict_size_mb, solid=solid, password=password)
+        return compress_with_7z_cli(input_path, archive_path, dict_size_mb=dict_size_mb, solid=solid, password=password,
+                                    threads=threads)
 
     if method == "py7zr":
         return compress_with_py7zr(input_path, archive_path, dict_size_mb=dict_size_mb, password=password, solid=solid)
@@ -351,15 +625,52 @@ def compress_file(
         return compress_with_xz(input_path, archive_path, preset=9)
 
     # auto
+    if not password and _find_zstd_exe():
+        return compress_with_zstd_cli(input_path, archive_path, threads=threads)
     if _find_7z_exe():
-        return compress_with_7z_cli(input_path, archive_path, dict_size_mb=dict_size_mb, solid=solid, password=password)
+        return compress_with_7z_cli(input_path, archive_path, dict_size_mb=dict_size_mb, solid=solid, password=password,
+                                    threads=threads)
     if _HAS_PY7ZR:
         return compress_with_py7zr(input_path, archive_path, dict_size_mb=dict_size_mb, password=password, solid=solid)
     if password:
         raise RuntimeError("No 7z available and .xz does not support passwords")
+    if _HAS_ZSTANDARD:
+        return compress_with_zstandard(input_path, archive_path)
     return compress_with_xz(input_path, archive_path, preset=9)
 
 
+def compress_files(
+    input_paths: Sequence[str],
+    archive_path: str,
+    *,
+    method: str = "auto",          # "auto" | "7z" | "py7zr"
+    password: Optional[str] = None,
+    dict_size_mb: int = 256,
+    solid: bool = True,
+    threads: Optional[int] = None,
+) -> Path:
+    """
+    Compress several files into one .7z archive (one process / one writer).
+
+    - method="auto": prefer system 7z CLI -> py7zr
+    - method="7z"  : require system 7z CLI
+    - method="py7zr": require py7zr
+    (.zst and .xz are single-stream formats and hold one file each.)
+
+    Returns the Path to the created archive.
+    """
+    method = method.lower()
+    if method not in {"auto", "7z", "py7zr"}:
+        raise ValueError("multi-file archives need method auto, 7z or py7zr")
+
+    if method == "7z" or (method == "auto" and _find_7z_exe()):
+        return compress_many_with_7z_cli(input_paths, archive_path, dict_size_mb=dict_size_mb, solid=solid,
+                                         password=password, threads=threads)
+    if method == "py7zr" or _HAS_PY7ZR:
+        return compress_many_with_py7zr(input_paths, archive_path, dict_size_mb=dict_size_mb, password=password)
+    raise RuntimeError("Neither 7z CLI nor py7zr is available for a multi-file archive")
+
+
 def decompress_file(
     archive_path: str,
     out_dir: str = ".",
@@ -370,15 +681,16 @@ def decompress_file(
     """
     Decompress an archive created by this script.
 
-    - If method is None, infer from extension (.7z -> 7z, .xz -> xz).
+    - If method is None, infer from extension (.7z -> 7z, .zst -> zstd, .xz -> xz).
     - For .7z: prefer system 7z CLI; fall back to py7zr if available.
+    - For .zst: prefer zstd CLI; fall back to zstandard if available.
     - For .xz: use built-in lzma.
     Returns the output path (dir for .7z, file for .xz).
     """
     ap = Path(archive_path)
     ext = ap.suffix.lower()
     if method is None:
-        method = "7z" if ext == ".7z" else "xz" if ext == ".xz" else "auto"
+        method = "7z" if ext == ".7z" else "zstd" if ext == ".zst" else "xz" if ext == ".xz" else "auto"
 
     method = method.lower()
     if method == "7z" or (method == "auto" and ext == ".7z"):
@@ -388,6 +700,13 @@ def decompress_file(
             return decompress_with_py7zr(archive_path, out_dir, password=password)
         raise RuntimeError("Neither 7z CLI nor py7zr is available to extract .7z")
 
+    if method == "zstd" or (method == "auto" and ext == ".zst"):
+        if _find_zstd_exe():
+            return decompress_with_zstd_cli(archive_path, out_dir)
+        if _HAS_ZSTANDARD:
+            return decompress_with_zstandard(archive_path, out_dir)
+        raise RuntimeError("Neither zstd CLI nor zstandard is available to extract .zst")
+
     if method == "xz" or (method == "auto" and ext == ".xz"):
         if password:
             raise ValueError(".xz does not support passwords")
@@ -428,22 +747,25 @@ def decompress_file(
 # ------------------------------
 
 def _build_cli():
-    p = argparse.ArgumentParser(description="Lossless compressor/decompressor for log files (prefers 7z Ultra).")
+    p = argparse.ArgumentParser(description="Lossless compressor/decompressor for log files (prefers zstd, then 7z Ultra).")
     sub = p.add_subparsers(dest="cmd", required=True)
 
-    pc = sub.add_parser("compress", help="Compress a file (prefers 7z Ultra)")
-    pc.add_argument("--in", dest="inp", required=True, help="Input file path")
-    pc.add_argument("--out", dest="outp", default=None, help="Output archive path (default: add .7z or .xz)")
-    pc.add_argument("--method", choices=["auto", "7z", "py7zr", "xz"], default="auto",
+    pc = sub.add_parser("compress", help="Compress a file (prefers zstd, then 7z Ultra)")
+    pc.add_argument("--in", dest="inp", required=True, nargs="+",
+                    help="Input file path (several files go into one .7z; --out is then required)")
+    pc.add_argument("--out", dest="outp", default=None, help="Output archive path (default: add .zst, .7z or .xz)")
+    pc.add_argument("--method", choices=["auto", "zstd", "7z", "py7zr", "xz"], default="auto",
                     help="Compression backend (default: auto)")
     pc.add_argument("--password", default=None, help="Archive password (7z only). Headers are encrypted too.")
     pc.add_argument("--dict-mb", type=int, default=256, help="Dictionary size for 7z (MiB). Default: 256")
     pc.add_argument("--no-solid", action="store_true", help="Disable solid archive mode (7z)")
+    pc.add_argument("--threads", type=int, default=None,
+                    help="Thread count for the 7z/zstd CLIs (default: number of CPUs)")
 
     pd = sub.add_parser("decompress", help="Decompress an archive")
-    pd.add_argument("--in", dest="arch", required=True, help="Input archive path (.7z or .xz)")
-    pd.add_argument("--out-dir", dest="out_dir", default=".", help="Output directory (for .7z) or file's directory (.xz)")
-    pd.add_argument("--method", choices=["auto", "7z", "py7zr", "xz"], default=None,
+    pd.add_argument("--in", dest="arch", required=True, help="Input archive path (.7z, .zst or .xz)")
+    pd.add_argument("--out-dir", dest="out_dir", default=".", help="Output directory (for .7z) or file's directory (.zst/.xz)")
+    pd.add_argument("--method", choices=["auto", "zstd", "7z", "py7zr", "xz"], default=None,
                     help="Decompression backend (default: infer from extension)")
     pd.add_argument("--password", default=None, help="Archive password (7z only)")
 
@@ -457,8 +779,16 @@ def main():
     if args.cmd == "compress":
         solid = not args.no_solid
         try:
-            out = compress_file(args.inp, args.outp, method=args.method,
-                                password=args.password, dict_size_mb=args.dict_mb, solid=solid)
+            if len(args.inp) > 1:
+                if not args.outp:
+                    raise ValueError("--out is required when compressing several files")
+                out = compress_files(args.inp, args.outp, method=args.method,
+                                     password=args.password, dict_size_mb=args.dict_mb, solid=solid,
+                                     threads=args.threads)
+            else:
+                out = compress_file(args.inp[0], args.outp, method=args.method,
+                                    password=args.password, dict_size_mb=args.dict_mb, solid=solid,
+                                    threads=args.threads)
         except Exception as e:
             print(f"[compress error] {e}", file=sys.stderr)
             sys.exit(2)
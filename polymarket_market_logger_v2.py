@@ -18,67 +18,173 @@ Usage:
   python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --jsonl
   # Optional: store raw JSON (no compression); implies --jsonl
   python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --raw --jsonl
+  # Optional: deflate several frames per line once ~N bytes are pending
+  # (batched frames are written out after at most --flush-max-ms, default 500, either way)
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --flush-bytes 4096
+  # Optional: fsync every record (default coalesces: every 64 records or 500 ms)
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --fsync-every-n 1
+  # Optional: deflate against a preset dictionary (see train_dict.py; decode with --dict too)
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --dict updates.dict
+  # Optional: one persistent DEFLATE stream per session (smaller; lines decode only in order)
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --stream
+  # Optional: asyncio ingest (websockets, on uvloop when installed)
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --async
+  # Optional (Linux): pin reader/writer threads to CPUs 0/1 and raise priority
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --pin-cpus 0,1 --nice -5
 
 Requires:
-  pip install websocket-client
+  pip install websocket-client      # default (threaded) client
+  pip install websockets [uvloop]   # --async client
+Optional (faster DEFLATE / JSON, see decoder.py):
+  pip install deflate isal orjson
 """
 import argparse
+import asyncio
+import io
 import json
 import os
+import queue
 import random
 import signal
 import sys
 import threading
 import time
-from typing import Optional, Callable, Union, List
+from typing import Optional, Callable, Union, List, Tuple
 
-from websocket import WebSocketApp  # pip install websocket-client
+try:
+    from websocket import WebSocketApp  # pip install websocket-client
+except Exception:
+    WebSocketApp = None  # validated at runtime
+
+# Optional: asyncio client (pip install websockets) and event loop (pip install uvloop)
+try:
+    import websockets  # type: ignore
+    _HAS_WEBSOCKETS = True
+except Exception:
+    _HAS_WEBSOCKETS = False
 
-# Import the V3 compressor (stateful) from decoder.py (same directory)
 try:
-    from decoder import FrameCompressorV3  # noqa
+    import uvloop  # type: ignore
+    _HAS_UVLOOP = True
 except Exception:
-    FrameCompressorV3 = None  # validated at runtime
+    _HAS_UVLOOP = False
+
+# V3 compressor (stateful) and the shared JSON helpers (orjson when installed)
+# from decoder.py (same directory)
+from decoder import FrameCompressorV3, _dumpb, _loads, _loads_exact  # noqa
 
 WS_BASE = "wss://ws-subscriptions-clob.polymarket.com"
 WS_PATH = "/ws/market"  # market channel path
 PING_INTERVAL_SEC = 10
 MAX_BACKOFF_SEC = 60
+WRITER_BATCH = 256  # frames drained per writer-thread wake-up
+WRITE_BUFFER = 1 << 20  # DurableJsonlWriter userspace buffer (bytes)
+
+
+def _pin_current_thread(cpu: int, log: Callable[..., None]) -> None:
+    """Bind the calling thread to one CPU (Linux); logged no-op where unsupported."""
+    try:
+        os.sched_setaffinity(threading.get_native_id(), {cpu})
+    except (AttributeError, OSError, ValueError) as e:
+        log(f"[affinity] cpu {cpu} not applied:", e)
+
+
+def _as_text(message: Union[str, bytes]) -> str:
+    if isinstance(message, (bytes, bytearray)):
+        return message.decode("utf-8", "replace")
+    return message
 
 
 class DurableJsonlWriter:
     """
-    Append-only writer that can write either JSONL (write_json) or raw lines (write_line).
-    Flushes and fsyncs each record for durability.
+    Append-only writer that can write either JSONL (write_json), raw lines (write_line)
+    or ready-made bytes (write_bytes). The file is opened in binary mode.
+    fsyncs are coalesced: every 'flush_every_n' records or every 'flush_every_ms'
+    milliseconds (background timer), whichever comes first, and once more on close.
+    flush_every_n <= 1 restores the old per-record fsync.
     """
-    def __init__(self, path: str):
+    def __init__(self, path: str, flush_every_n: int = 64, flush_every_ms: int = 500):
         self.path = path
-        self._fh = open(self.path, "a", buffering=1, encoding="utf-8")
+        # explicit 1 MiB userspace buffer over the raw fd: write() is a memcpy
+        # until the fsync policy fires (flush, then fsync) or the buffer fills
+        self._raw = open(self.path, "ab", buffering=0)
+        self._fh = io.BufferedWriter(self._raw, buffer_size=WRITE_BUFFER)
         self._lock = threading.Lock()
+        self.flush_every_n = max(1, int(flush_every_n))
+        self.flush_every_ms = max(0, int(flush_every_ms))
+        self._pending_count = 0
+        self._last_flush_ns = time.monotonic_ns()
+        self._closed = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        if self.flush_every_ms:
+            self._timer = threading.Thread(target=self._timer_loop, daemon=True)
+            self._timer.start()
+
+    def _sync_locked(self):
+        # caller holds self._lock
+        self._fh.flush()  # userspace buffer -> kernel
+        os.fsync(self._raw.fileno())
+        self._pending_count = 0
+        self._last_flush_ns = time.monotonic_ns()
+
+    def _timer_loop(self):
+        period = self.flush_every_ms / 1000.0
+        while not self._closed.wait(period):
+            try:
+                with self._lock:
+                    if self._pending_count and not self._fh.closed:
+                        self._sync_locked()
+            except Exception:
+                pass
 
-    def write_json(self, obj):
-        line = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    def _write(self, data: bytes):
         with self._lock:
-            self._fh.write(line + "\n")
-            self._fh.flush()
-            os.fsync(self._fh.fileno())
+            self._fh.write(data)
+            self._pending_count += 1
+            self._maybe_sync_locked()
+
+    def _maybe_sync_locked(self):
+        # caller holds self._lock
+        if (self._pending_count >= self.flush_every_n
+                or (self.flush_every_ms
+                    and time.monotonic_ns() - self._last_flush_ns >= self.flush_every_ms * 1_000_000)):
+            self._sync_locked()
+
+    def write_json(self, obj):
+        self._write(_dumpb(obj) + b"\n")
 
     def write_line(self, line: str):
         if not isinstance(line, str):
             raise TypeError("write_line expects a str")
         if "\n" in line:
             line = line.replace("\n", "\\n")
+        self._write(line.encode("utf-8") + b"\n")
+
+    def write_bytes(self, data: bytes):
+        """Write one pre-encoded record; 'data' must already end with b"\\n"."""
+        self._write(data)
+
+    def write_lines(self, lines: List[Union[str, bytes]]):
+        """
+        Write several lines as one group: a single writelines() under one lock
+        acquisition, so e.g. header + frame are never split by a periodic fsync.
+        str items are UTF-8 encoded; a trailing newline is appended to each item.
+        """
+        encoded = [(ln if isinstance(ln, bytes) else ln.encode("utf-8")) + b"\n" for ln in lines]
+        if not encoded:
+            return
         with self._lock:
-            self._fh.write(line + "\n")
-            self._fh.flush()
-            os.fsync(self._fh.fileno())
+            self._fh.writelines(encoded)
+            self._pending_count += len(encoded)
+            self._maybe_sync_locked()
 
     def close(self):
+        self._closed.set()
         try:
             with self._lock:
-                self._fh.flush()
-                os.fsync(self._fh.fileno())
-                self._fh.close()
+                if not self._fh.closed:
+                    self._sync_locked()
+                    self._fh.close()
         except Exception:
             pass
 
@@ -97,98 +203,214 @@ class MarketSubscriber:
 
     If compression_fn is None, we store the parsed JSON payload (or raw string)
     under {"t": <epoch_ms>, "a": <asset_id>, "m": <payload>}.
+
+    If flush_fn is provided (batching compressors), any line it returns is written
+    like a regular compressed payload: on shutdown, ahead of a fail-safe record
+    (so output keeps arrival order), and whenever the pending batch is older than
+    'batch_max_age_ms' (checked by the writer thread, or per frame without one),
+    so a quiet market never leaves records sitting in memory.
+
+    With writer_thread=True (default), _on_message only timestamps and queues the
+    frame; a writer thread compresses queued frames and writes each drained batch
+    with one write_lines() call, so slow disks never stall the websocket reader.
+
+    pin_cpus=(reader_cpu, writer_cpu) binds the websocket reader (the thread
+    calling run_forever) and the writer thread to fixed CPUs (Linux only).
     """
     def __init__(
         self,
         asset_id: str,
         out_path: str,
         verbose: bool = True,
-        compression_fn: Optional[Callable[[str], Union[str, List[str]]]] = None,
+        compression_fn: Optional[Callable[[Union[str, bytes]], Union[str, List[str]]]] = None,
         compact_records: bool = True,
+        flush_fn: Optional[Callable[[], Optional[str]]] = None,
+        fsync_every_n: int = 64,
+        fsync_every_ms: int = 500,
+        writer_thread: bool = True,
+        pin_cpus: Optional[Tuple[int, int]] = None,
+        batch_max_age_ms: int = 500,
     ):
         self.asset_id = asset_id
-        self.out = DurableJsonlWriter(out_path)
+        self.out = DurableJsonlWriter(out_path, flush_every_n=fsync_every_n, flush_every_ms=fsync_every_ms)
         self.verbose = verbose
         self.ws: Optional[WebSocketApp] = None
         self._stop = threading.Event()
         self._ping_thread: Optional[threading.Thread] = None
         self.compression_fn = compression_fn
         self.compact_records = compact_records
+        self.flush_fn = flush_fn
+        self.batch_max_age_ms = max(0, int(batch_max_age_ms))
+        self._last_batch_flush_ns = time.monotonic_ns()
+        # subscribe payload, built once and resent as-is on every reconnect
+        self._sub_msg = json.dumps({"assets_ids": [asset_id], "type": "market"}, separators=(",", ":"))
+        # frames waiting for the writer thread: (epoch_ms, message), None = stop
+        self._q: Optional[queue.SimpleQueue] = None
+        self._writer: Optional[threading.Thread] = None
+        self.pin_cpus = pin_cpus
+        if writer_thread:
+            self._q = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
 
     def _log(self, *args):
         if self.verbose:
-            print(*args, file=sys.stderr, flush=True)
+            try:
+                print(*args, file=sys.stderr, flush=True)
+            except Exception:
+                pass  # e.g. stderr closed: logging must never stop ingestion
 
     def _on_open(self, ws):
         self._log("[open] connected, subscribing...")
-        sub_msg = {"assets_ids": [self.asset_id], "type": "market"}
-        ws.send(json.dumps(sub_msg))
-        self._log("[open] subscribe payload sent:", sub_msg)
+        ws.send(self._sub_msg)
+        if self.verbose:
+            self._log("[open] subscribe payload sent:", self._sub_msg)
         # Start PING loop
         self._ping_thread = threading.Thread(target=self._ping_loop, args=(ws,), daemon=True)
         self._ping_thread.start()
 
-    def _write_compact(self, payload: Union[str, List[str]]):
-        if isinstance(payload, list):
-            for item in payload:
-                self.out.write_line(item)
-        else:
-            self.out.write_line(payload)
-
-    def _write_jsonl(self, epoch_ms: int, payload: Union[str, List[str]]):
-        if isinstance(payload, list):
-            for item in payload:
-                self.out.write_json({"t": epoch_ms, "a": self.asset_id, "c": item})
-        else:
-            self.out.write_json({"t": epoch_ms, "a": self.asset_id, "c": payload})
-
-    def _on_message(self, ws, message: str):
-        epoch_ms = int(time.time() * 1000)
+    def _compact_lines(self, payload: Union[str, List[str]]) -> List[bytes]:
+        # compressor output is base64-url (ASCII, no newlines): encode once, skip checks
+        if not isinstance(payload, list):
+            payload = [payload]
+        return [item.encode("ascii") for item in payload]
+
+    def _jsonl_lines(self, epoch_ms: int, payload: Union[str, List[str]]) -> List[bytes]:
+        if not isinstance(payload, list):
+            payload = [payload]
+        return [_dumpb({"t": epoch_ms, "a": self.asset_id, "c": item}) for item in payload]
+
+    def _flushed_lines(self, epoch_ms: int) -> List[bytes]:
+        """Lines holding the compressor's pending batched records ([] if none)."""
+        self._last_batch_flush_ns = time.monotonic_ns()
+        if not self.flush_fn:
+            return []
+        try:
+            tail = self.flush_fn()
+        except Exception as e:
+            self._log("[flush error]", e)
+            return []
+        if not tail:
+            return []
+        if self.compact_records:
+            return self._compact_lines(tail)
+        return self._jsonl_lines(epoch_ms, tail)
+
+    def _flush_compressor(self):
+        lines = self._flushed_lines(time.time_ns() // 1_000_000)
+        if lines:
+            self.out.write_lines(lines)
+
+    def _batch_expired(self) -> bool:
+        return bool(self.flush_fn and self.batch_max_age_ms
+                    and time.monotonic_ns() - self._last_batch_flush_ns >= self.batch_max_age_ms * 1_000_000)
+
+    def _on_message(self, ws, message: Union[str, bytes]):
+        epoch_ms = time.time_ns() // 1_000_000
+        if self._q is not None:
+            self._q.put((epoch_ms, message))
+            return
+        lines = self._encode_message(epoch_ms, message)
+        if self._batch_expired():
+            lines += self._flushed_lines(epoch_ms)
+        self.out.write_lines(lines)
+
+    def _writer_loop(self):
+        if self.pin_cpus:
+            _pin_current_thread(self.pin_cpus[1], self._log)
+        q = self._q
+        # wake up at least once per max batch age so idle periods still flush
+        period = self.batch_max_age_ms / 1000.0 if (self.flush_fn and self.batch_max_age_ms) else None
+        while True:
+            try:
+                batch = [q.get(timeout=period)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < WRITER_BATCH:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            lines: List[bytes] = []
+            done = False
+            for item in batch:
+                if item is None:
+                    done = True
+                    break
+                try:
+                    lines += self._encode_message(*item)
+                except Exception as e:
+                    # one bad frame must not kill the thread (the queue would grow unbounded)
+                    self._log("[encode error]", e)
+            if not done and self._batch_expired():
+                lines += self._flushed_lines(time.time_ns() // 1_000_000)
+            if lines:
+                try:
+                    self.out.write_lines(lines)
+                except Exception as e:
+                    self._log("[write error]", e)
+            if done:
+                return
 
-        # Log event type if possible
+    def _stop_writer(self):
+        """Drain the queue and join the writer thread (idempotent)."""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        self._q.put(None)
+        writer.join()
+
+    def _encode_message(self, epoch_ms: int, message: Union[str, bytes]) -> List[bytes]:
+        """Compress (or wrap) one server frame into the output lines to append."""
+        # Log event type if possible (verbose only: the parse is otherwise wasted)
         ev = None
-        try:
-            maybe = json.loads(message)
-            if isinstance(maybe, dict):
-                ev = maybe.get("event_type")
-            elif isinstance(maybe, list) and maybe:
-                head = maybe[0]
-                if isinstance(head, dict):
-                    ev = head.get("event_type")
-                    if len(maybe) > 1:
-                        ev = f"{ev}+{len(maybe)-1}"
-        except Exception:
-            pass
+        if self.verbose:
+            try:
+                maybe = _loads(message)
+                if isinstance(maybe, dict):
+                    ev = maybe.get("event_type")
+                elif isinstance(maybe, list) and maybe:
+                    head = maybe[0]
+                    if isinstance(head, dict):
+                        ev = head.get("event_type")
+                        if len(maybe) > 1:
+                            ev = f"{ev}+{len(maybe)-1}"
+            except Exception:
+                pass
 
         if self.compression_fn:
             try:
                 compressed = self.compression_fn(message)  # may return str or [str, ...]
             except Exception as e:
                 # Fail-safe path: store parsed JSON to avoid data loss.
+                # Earlier frames still batched in the compressor go out first.
                 self._log("[compress error]", e)
+                lines = self._flushed_lines(epoch_ms)
                 try:
-                    payload = json.loads(message)
+                    payload = _loads_exact(message)
                 except Exception:
-                    payload = {"_raw": message}
-                self.out.write_json({"t": epoch_ms, "a": self.asset_id, "m": payload})
-                return
+                    payload = {"_raw": _as_text(message)}
+                lines.append(_dumpb({"t": epoch_ms, "a": self.asset_id, "m": payload}))
+                return lines
 
             if self.compact_records:
-                self._write_compact(compressed)
+                lines = self._compact_lines(compressed)
             else:
-                self._write_jsonl(epoch_ms, compressed)
+                lines = self._jsonl_lines(epoch_ms, compressed)
         else:
             # Raw JSON path (debug)
             try:
-                payload = json.loads(message)
+                payload = _loads_exact(message)
             except Exception:
-                payload = {"_raw": message}
-            self.out.write_json({"t": epoch_ms, "a": self.asset_id, "m": payload})
+                payload = {"_raw": _as_text(message)}
+            lines = [_dumpb({"t": epoch_ms, "a": self.asset_id, "m": payload})]
 
-        if ev:
-            self._log(f"[msg] {ev} @ {epoch_ms}")
-        else:
-            self._log(f"[msg] @ {epoch_ms}")
+        if self.verbose:
+            if ev:
+                self._log(f"[msg] {ev} @ {epoch_ms}")
+            else:
+                self._log(f"[msg] @ {epoch_ms}")
+        return lines
 
     def _on_error(self, ws, error):
         self._log("[error]", error)
@@ -216,13 +438,17 @@ class MarketSubscriber:
         )
 
     def run_forever(self):
+        if self.pin_cpus:
+            _pin_current_thread(self.pin_cpus[0], self._log)
         backoff = 1.0
         try:
             while not self._stop.is_set():
                 self.ws = self._make_ws()
                 self._log(f"[connect] {WS_BASE}{WS_PATH}")
                 try:
-                    self.ws.run_forever()
+                    # text frames are parsed by the compressor anyway; skip the
+                    # per-frame pure-Python UTF-8 validation pass
+                    self.ws.run_forever(skip_utf8_validation=True)
                 except KeyboardInterrupt:
                     self._log("[interrupt] stopping...")
                     break
@@ -241,6 +467,8 @@ class MarketSubscriber:
                 backoff = min(backoff * 2, MAX_BACKOFF_SEC)
                 self._stop.clear()
         finally:
+            self._stop_writer()
+            self._flush_compressor()
             self.out.close()
 
     def stop(self):
@@ -250,9 +478,120 @@ class MarketSubscriber:
                 self.ws.close()
             except Exception:
                 pass
+        self._stop_writer()
+        self._flush_compressor()
         self.out.close()
 
 
+class AsyncMarketSubscriber(MarketSubscriber):
+    """
+    asyncio variant of MarketSubscriber on the 'websockets' client (uvloop when installed).
+
+    Protocol keepalive pings are handled by the library; the text "PING" the
+    market channel answers with "PONG" is sent from a task instead of a thread.
+    Frames go to the writer thread; without one (writer_thread=False) each frame
+    is compressed and written via asyncio.to_thread (one at a time, so order is
+    kept) while the event loop keeps reading the socket.
+    Unlike the threaded client, dropped connections are retried with backoff
+    until stop is requested. stop() may be called from any thread: it asks the
+    event loop to close the connection and run_forever does the teardown.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._aws = None  # current websockets connection
+        self._astop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _ping_task(self, ws):
+        try:
+            while True:
+                await asyncio.sleep(PING_INTERVAL_SEC)
+                await ws.send("PING")
+        except Exception as e:  # e.g. ConnectionClosed: the reader loop reconnects
+            self._log("[ping] error:", e)
+
+    def _request_stop(self):
+        self._stop.set()
+        if self._astop is not None:
+            self._astop.set()
+        if self._aws is not None:
+            asyncio.ensure_future(self._aws.close())
+
+    async def _run(self):
+        self._astop = asyncio.Event()
+        loop = self._loop = asyncio.get_running_loop()
+        if self._stop.is_set():  # stop() raced the loop start-up
+            return
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._request_stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # e.g. Windows: KeyboardInterrupt still ends asyncio.run
+        url = WS_BASE + WS_PATH
+        backoff = 1.0
+        while not self._stop.is_set():
+            self._log(f"[connect] {url}")
+            try:
+                async with websockets.connect(url, ping_interval=PING_INTERVAL_SEC, max_size=None) as ws:
+                    self._aws = ws
+                    if self._stop.is_set():  # stop requested while connecting
+                        break
+                    self._log("[open] connected, subscribing...")
+                    await ws.send(self._sub_msg)
+                    if self.verbose:
+                        self._log("[open] subscribe payload sent:", self._sub_msg)
+                    pinger = asyncio.ensure_future(self._ping_task(ws))
+                    try:
+                        async for message in ws:
+                            if self._q is not None:
+                                self._on_message(ws, message)  # just queues it
+                            else:
+                                await asyncio.to_thread(self._on_message, ws, message)
+                    finally:
+                        pinger.cancel()
+                self._log("[close] connection closed")
+            except Exception as e:
+                self._log("[error]", e)
+            finally:
+                self._aws = None
+
+            if self._stop.is_set():
+                break
+            sleep_for = min(backoff, MAX_BACKOFF_SEC) + random.random()
+            self._log(f"[reconnect] retrying in {sleep_for:.1f}s")
+            try:
+                await asyncio.wait_for(self._astop.wait(), timeout=sleep_for)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, MAX_BACKOFF_SEC)
+
+    def run_forever(self):
+        if self.pin_cpus:
+            _pin_current_thread(self.pin_cpus[0], self._log)
+        try:
+            if _HAS_UVLOOP:
+                uvloop.install()
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            self._log("[interrupt] stopping...")
+        finally:
+            self._loop = None
+            self._stop_writer()
+            self._flush_compressor()
+            self.out.close()
+
+    def stop(self):
+        self._stop.set()
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._request_stop)
+                return  # run_forever tears down once the loop exits
+            except RuntimeError:
+                pass  # loop already closed
+        super().stop()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Polymarket market-channel logger (V3 MAX COMPRESSION).")
     parser.add_argument("--asset", required=False,
@@ -264,34 +603,83 @@ def main():
                         help="store raw JSON (no compression); implies --jsonl")
     parser.add_argument("--jsonl", action="store_true",
                         help="store JSONL wrapper records instead of bare base64 lines")
+    parser.add_argument("--flush-bytes", type=int, default=0,
+                        help="batch frames into one line until ~N bytes are pending (default: 0, one line per frame)")
+    parser.add_argument("--flush-max-ms", type=int, default=500,
+                        help="with --flush-bytes, also write out batched frames older than this (default: 500; 0 = off)")
+    parser.add_argument("--fsync-every-n", type=int, default=64,
+                        help="fsync the output after this many records (default: 64; 1 = every record)")
+    parser.add_argument("--fsync-every-ms", type=int, default=500,
+                        help="also fsync pending records at least this often (default: 500; 0 = off)")
+    parser.add_argument("--dict", dest="dict_path", default=None,
+                        help="preset DEFLATE dictionary for compressed lines (see train_dict.py)")
+    parser.add_argument("--stream", action="store_true",
+                        help="sync-flush lines from one persistent DEFLATE stream (smaller; decode in order)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="use the asyncio 'websockets' client (uvloop when installed)")
+    parser.add_argument("--pin-cpus", default=None, metavar="READER,WRITER",
+                        help="pin the websocket reader and writer threads to these CPUs (Linux), e.g. 0,1")
+    parser.add_argument("--nice", type=int, default=0,
+                        help="adjust process priority by this increment (negative needs CAP_SYS_NICE)")
     args = parser.parse_args()
 
+    flush_fn = None
     if args.raw:
         compression_fn = None
         compact_records = False
     else:
-        if FrameCompressorV3 is None:
-            print("ERROR: decoder.FrameCompressorV3 not available. Ensure decoder.py is in the same directory.",
-                  file=sys.stderr)
-            sys.exit(2)
-        comp = FrameCompressorV3(asset_id=args.asset)
+        zdict = None
+        if args.dict_path:
+            with open(args.dict_path, "rb") as f:
+                zdict = f.read()
+        comp = FrameCompressorV3(asset_id=args.asset, flush_threshold=args.flush_bytes, zdict=zdict,
+                                 stream=args.stream)
         compression_fn = comp.compress  # returns str or [str, ...]
+        flush_fn = comp.flush
         compact_records = not args.jsonl
 
-    sub = MarketSubscriber(
+    pin_cpus = None
+    if args.pin_cpus:
+        try:
+            reader_cpu, writer_cpu = (int(x) for x in args.pin_cpus.split(","))
+        except ValueError:
+            print("ERROR: --pin-cpus expects READER,WRITER (e.g. 0,1)", file=sys.stderr)
+            sys.exit(2)
+        pin_cpus = (reader_cpu, writer_cpu)
+    if args.nice:
+        try:
+            os.nice(args.nice)
+        except (AttributeError, OSError) as e:
+            print(f"WARNING: --nice {args.nice} not applied: {e}", file=sys.stderr)
+
+    if args.use_async and not _HAS_WEBSOCKETS:
+        print("ERROR: --async needs the websockets package (pip install websockets).", file=sys.stderr)
+        sys.exit(2)
+    if not args.use_async and WebSocketApp is None:
+        print("ERROR: websocket-client not available (pip install websocket-client).", file=sys.stderr)
+        sys.exit(2)
+
+    sub_cls = AsyncMarketSubscriber if args.use_async else MarketSubscriber
+    sub = sub_cls(
         asset_id=args.asset,
         out_path=args.out,
         verbose=args.verbose,
         compression_fn=compression_fn,
         compact_records=compact_records,
+        flush_fn=flush_fn,
+        fsync_every_n=args.fsync_every_n,
+        fsync_every_ms=args.fsync_every_ms,
+        pin_cpus=pin_cpus,
+        batch_max_age_ms=args.flush_max_ms,
     )
 
     def handle_sig(sig, frame):
         sub.stop()
         sys.exit(0)
 
-    signal.signal(signal.SIGINT, handle_sig)
-    signal.signal(signal.SIGTERM, handle_sig)
+    if not args.use_async:  # the async client installs loop signal handlers itself
+        signal.signal(signal.SIGINT, handle_sig)
+        signal.signal(signal.SIGTERM, handle_sig)
 
     sub.run_forever()
 
@@ -0,0 +1,67 @@
+"""
+Regression tests for the V3 codec (run: python -m unittest test_decoder).
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from decoder import FrameCompressorV3, reinflate_file_objects
+from polymarket_market_logger_v2 import MarketSubscriber
+
+ASSET = "99893023379138991987588721165418832163151219014135327227724239090994347225334"
+
+
+def _frames(n, seed=7):
+    rnd = random.Random(seed)
+    ts = 1700000000000
+    out = []
+    for _ in range(n):
+        ts += rnd.choice([0, 1, 17, 250])
+        out.append(json.dumps([{
+            "event_type": "price_change", "asset_id": ASSET, "market": "0xabc", "timestamp": str(ts),
+            "changes": [{"side": rnd.choice(["BUY", "SELL"]), "price": "0.%02d" % rnd.randint(1, 99),
+                         "size": str(rnd.randint(0, 900))} for _ in range(rnd.randint(1, 5))],
+        }]))
+    return out
+
+
+class StreamModeFailSafeTest(unittest.TestCase):
+    def _log_and_decode(self, frames, **comp_kwargs):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "updates.v3")
+            comp = FrameCompressorV3(ASSET, **comp_kwargs)
+            sub = MarketSubscriber(ASSET, path, verbose=False, compression_fn=comp.compress,
+                                   flush_fn=comp.flush, writer_thread=False, fsync_every_ms=0)
+            for fr in frames:
+                sub._on_message(None, fr)
+            sub.stop()
+            return list(reinflate_file_objects(path))
+
+    def _check(self, **comp_kwargs):
+        frames = _frames(2000)
+        # the compressor rejects this frame; the logger stores a JSON fail-safe record.
+        # Its base64-url characters alone form a valid (4-aligned) token, so the
+        # lenient base64 decoder accepts the line.
+        frames[100] = json.dumps([{"event_type": "unknown", "asset_id": ASSET, "timestamp": "1234"}])
+        got = self._log_and_decode(frames, **comp_kwargs)
+        self.assertEqual(len(got), len(frames))
+        for k, (value, fr) in enumerate(zip(got, frames)):
+            if k == 100:
+                self.assertEqual(value["m"], json.loads(fr))  # fail-safe wrapper, in arrival order
+                continue
+            expected = json.loads(fr)
+            for ev in expected:
+                del ev["market"]
+            self.assertEqual(value, expected, f"frame {k}")
+
+    def test_fail_safe_line_inside_stream_session(self):
+        self._check(stream=True)
+
+    def test_fail_safe_line_inside_batched_stream_session(self):
+        self._check(stream=True, flush_threshold=4096)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Build a preset DEFLATE dictionary for V3 logs from an existing capture.
+
+Small per-line DEFLATE streams start with an empty window, so the first
+occurrence of every common byte pattern in a line is paid for in full. A
+preset dictionary (zlib 'zdict') pre-fills that window with the patterns
+that recur across lines: record/type-byte runs, common price literals, etc.
+
+The dictionary is built from the inflated V3 records of the first N lines:
+byte segments are ranked by how many lines contain them and the most common
+ones are packed (most useful last, i.e. closest to the data) up to 32 KiB,
+the largest window DEFLATE can reference.
+
+Usage:
+  python train_dict.py --in updates.v3 --out updates.dict [--lines 20000]
+  # then log and decode with it
+  python polymarket_market_logger.py --asset <ASSET_ID> --out <PATH> --dict updates.dict
+  python decoder.py --in <PATH> --out updates.ndjson --dict updates.dict
+"""
+import argparse
+import sys
+from collections import Counter
+from typing import Iterable, List
+
+# codec constants and helpers from decoder.py (same directory)
+from decoder import _REC_FRAME, _REC_RAW, _WINDOW, _b64dec, _inflate_raw, zdict_id
+
+MAX_DICT_SIZE = _WINDOW  # the most history a DEFLATE match can reach
+SEGMENT_LEN = 4
+
+
+def _iter_records(path: str, max_lines: int) -> Iterable[bytes]:
+    """Inflated V3 payloads of bare base64 lines (header lines are skipped)."""
+    n = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if n >= max_lines:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                buf = _inflate_raw(_b64dec(line.encode("ascii")))
+            except Exception:
+                continue  # JSONL wrappers / legacy lines / dictionary-compressed lines
+            n += 1
+            if buf and buf[0] in (_REC_FRAME, _REC_RAW):  # frame/raw records, not headers
+                yield buf
+
+
+def build_dictionary(samples: Iterable[bytes], size: int = MAX_DICT_SIZE,
+                     seg_len: int = SEGMENT_LEN) -> bytes:
+    """Pack the segments shared by the most samples into at most 'size' bytes."""
+    counts: Counter = Counter()
+    for s in samples:
+        counts.update({s[j:j + seg_len] for j in range(len(s) - seg_len + 1)})
+    picked: List[bytes] = []
+    blob = b""
+    total = 0
+    for seg, c in counts.most_common():
+        if c < 2 or total >= size:
+            break
+        if seg in blob:
+            continue
+        picked.append(seg)
+        blob += seg
+        total += len(seg)
+    # most frequent last: shortest match distances get the cheapest codes
+    return b"".join(reversed(picked))[-size:]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train a preset DEFLATE dictionary for V3 logs.")
+    ap.add_argument("--in", dest="input_path", required=True, help="existing V3 log (bare base64 lines)")
+    ap.add_argument("--out", dest="output_path", required=True, help="dictionary output path")
+    ap.add_argument("--lines", type=int, default=20000, help="number of lines to sample (default: 20000)")
+    ap.add_argument("--size", type=int, default=MAX_DICT_SIZE,
+                    help=f"dictionary size in bytes (default/max: {MAX_DICT_SIZE})")
+    args = ap.parse_args()
+
+    samples = list(_iter_records(args.input_path, args.lines))
+    if not samples:
+        print("ERROR: no V3 records found in input", file=sys.stderr)
+        sys.exit(2)
+    zdict = build_dictionary(samples, size=min(args.size, MAX_DICT_SIZE))
+    with open(args.output_path, "wb") as f:
+        f.write(zdict)
+    print(f"{args.output_path}: {len(zdict)} bytes from {len(samples)} records (id {zdict_id(zdict):#010x})",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()